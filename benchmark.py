@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+import urlparse
+from fake_monday import FakeMondayData, FakeMondayServer
+
+#Transport that records how long every request took, keyed by method and endpoint
+def timedTransport(pool_size):
+    from monday_transport import MondayTransport
+    class TimedTransport(MondayTransport):
+        def __init__(self):
+            MondayTransport.__init__(self, pool_size=pool_size)
+            self.timings = {}
+        def request(self, request_type, url, parameters):
+            start = time.time()
+            response = MondayTransport.request(self, request_type, url, parameters)
+            endpoint = "{} {}".format(request_type.upper(), re.sub(r"/\d+", "/{id}", urlparse.urlparse(url).path))
+            self.timings.setdefault(endpoint, []).append(time.time() - start)
+            return response
+    return TimedTransport()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+#Runs the scenarios against the server at base_url, this runs in its own process so the peak memory is the client's
+def runClient(base_url, page_size, concurrency):
+    import monday
+    from monday_automations import MondayAutomator
+    transport = timedTransport(max(10, concurrency))
+    api = monday.MondayAPI("benchmark", "benchmark", page_size=page_size, page_concurrency=concurrency, transport=transport, base_url=base_url)
+    wall_times = {}
+    start = time.time()
+    board = api.getBoardNamed("Operations Tasks")
+    wall_times["getBoards"] = time.time() - start
+    start = time.time()
+    pulses = board.getPulses()
+    wall_times["getPulses"] = time.time() - start
+    start = time.time()
+    reports = MondayAutomator(api=api).reset_week()
+    wall_times["reset_week"] = time.time() - start
+    endpoints = {}
+    for endpoint, timings in transport.timings.items():
+        endpoints[endpoint] = {"requests": len(timings), "p50": percentile(timings, 0.5), "p99": percentile(timings, 0.99)}
+    return {
+        "pulses": len(pulses),
+        "moves": reports[0]["moves"],
+        "wall_times": wall_times,
+        "endpoints": endpoints,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+#Runs in a fresh interpreter so nothing is imported yet, times importing the automations and the first request
+STARTUP_CLIENT = """
+import json, sys, time
+start = time.time()
+import monday
+import monday_automations
+imported = time.time()
+api = monday.MondayAPI("benchmark", "benchmark", base_url=sys.argv[1])
+api.getBoards()
+finished = time.time()
+print(json.dumps({"import_seconds": imported - start, "first_request_seconds": finished - imported, "json_backend": monday.monday_json.backend}))
+"""
+
+#Starts the given number of fresh processes against a small fake board and reports the median of each timing.
+#process_seconds is the whole process from spawn to exit, including the interpreter's own start up
+def runStartupBenchmark(runs):
+    server = FakeMondayServer(FakeMondayData.synthetic({"Operations Tasks": 10}))
+    base_url = server.start()
+    results = []
+    try:
+        for _ in range(runs):
+            start = time.time()
+            output = subprocess.check_output([sys.executable, "-c", STARTUP_CLIENT, base_url], cwd=os.path.dirname(os.path.abspath(__file__)))
+            result = json.loads(output)
+            result["process_seconds"] = time.time() - start
+            results.append(result)
+    finally:
+        server.stop()
+    median = lambda key: percentile(map(lambda x: x[key], results), 0.5)
+    return {"runs": runs, "json_backend": results[0]["json_backend"], "import_seconds": median("import_seconds"), "first_request_seconds": median("first_request_seconds"), "process_seconds": median("process_seconds")}
+
+def printStartupResult(result):
+    print("start up over {} runs, {} json backend: import {:.4f}s, first request {:.4f}s, whole process {:.4f}s".format(result["runs"], result["json_backend"], result["import_seconds"], result["first_request_seconds"], result["process_seconds"]))
+
+def runBenchmark(size, latency, page_size, concurrency):
+    data = FakeMondayData.synthetic({"Operations Tasks": size})
+    server = FakeMondayServer(data, latency=latency)
+    base_url = server.start()
+    try:
+        output = subprocess.check_output([sys.executable, __file__, "--client", base_url, "--page-size", str(page_size), "--concurrency", str(concurrency)])
+    finally:
+        server.stop()
+    result = json.loads(output)
+    result["size"] = size
+    result["server_requests"] = server.request_counts
+    return result
+
+def printResult(result):
+    print("{} pulses: getPulses {:.3f}s, reset_week {:.3f}s, peak rss {} KB".format(result["size"], result["wall_times"]["getPulses"], result["wall_times"]["reset_week"], result["peak_rss_kb"]))
+    for endpoint, stats in sorted(result["endpoints"].items()):
+        print("    {:<40} {:>7} requests  p50 {:.4f}s  p99 {:.4f}s".format(endpoint, stats["requests"], stats["p50"], stats["p99"]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MondayAPI and reset_week against the fake monday server")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="comma separated board sizes in pulses")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds the fake server adds to every request")
+    parser.add_argument("--page-size", type=int, default=25, help="pulses per page, at most MondayAPI's max_page_size")
+    parser.add_argument("--concurrency", type=int, default=1, help="pages fetched at once")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--startup", type=int, metavar="RUNS", help="only measure import time and time to the first request over this many fresh processes")
+    parser.add_argument("--client", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    if arguments.client != None:
+        print(json.dumps(runClient(arguments.client, arguments.page_size, arguments.concurrency)))
+        sys.exit(0)
+    if arguments.startup != None:
+        results = runStartupBenchmark(arguments.startup)
+        printStartupResult(results)
+    else:
+        results = []
+        for size in map(int, arguments.sizes.split(",")):
+            result = runBenchmark(size, arguments.latency, arguments.page_size, arguments.concurrency)
+            printResult(result)
+            results.append(result)
+    if arguments.json != None:
+        results_file = open(arguments.json, "w")
+        json.dump(results, results_file, indent=2)
+        results_file.close()
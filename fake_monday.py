@@ -0,0 +1,190 @@
+import BaseHTTPServer
+import SocketServer
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import urlparse
+
+#Board data served by the fake server, either generated or loaded from a recording.
+#A recording is a json file of the form {"boards": [<boards.json entries>], "pulses": {"<board id>": [<pulses.json entries>]}}
+class FakeMondayData:
+    def __init__(self, boards, pulses):
+        self.boards = boards
+        self.pulses = pulses
+        self.lock = threading.Lock()
+    @staticmethod
+    def fromRecording(path):
+        recording_file = open(path, "r")
+        recording = json.load(recording_file)
+        recording_file.close()
+        return FakeMondayData(recording["boards"], dict(map(lambda x: (int(x[0]), x[1]), recording["pulses"].items())))
+    #Generates boards shaped like the ones reset_week works on, pulse_counts maps board names to their size
+    @staticmethod
+    def synthetic(pulse_counts, seed=0):
+        generator = random.Random(seed)
+        today = datetime.date.today()
+        boards = []
+        pulses = {}
+        for board_id, (name, count) in enumerate(sorted(pulse_counts.items()), 1):
+            groups = [{"id": "this_week", "title": "This Week"}, {"id": "future", "title": "Future"}, {"id": "completed", "title": "Completed"}]
+            boards.append({
+                "url": "https://fake.monday.com/boards/{}".format(board_id), "id": board_id, "name": name, "description": "",
+                "board_kind": "public", "created_at": "2018-01-01T00:00:00Z", "updated_at": "2018-01-01T00:00:00Z",
+                "columns": [
+                    {"id": "name", "title": "Name", "type": "name"},
+                    {"id": "status", "title": "Status", "type": "color", "labels": {"0": "Working on it", "1": "Done", "2": "Stuck"}},
+                    {"id": "person", "title": "Person", "type": "person"},
+                    {"id": "timeline", "title": "Timeline", "type": "timerange"}
+                ],
+                "groups": map(lambda x: dict(x, color="#037f4c", board_id=board_id, archived=False, deleted=False), groups)
+            })
+            board_pulses = []
+            for index in range(count):
+                pulse_id = board_id * 10000000 + index
+                start = today + datetime.timedelta(days=generator.randint(-14, 28))
+                updated_at = "2018-01-{:02d}T00:00:00Z".format(generator.randint(1, 28))
+                board_pulses.append({
+                    "pulse": {"id": pulse_id, "name": "Pulse {}".format(index), "created_at": "2018-01-01T00:00:00Z", "updated_at": updated_at, "board_id": board_id, "url": "https://fake.monday.com/pulses/{}".format(pulse_id)},
+                    "board_meta": {"group_id": generator.choice(groups)["id"], "position": index},
+                    "column_values": [
+                        {"cid": "name", "title": "Name", "name": "Pulse {}".format(index)},
+                        {"cid": "status", "title": "Status", "value": {"index": generator.randint(0, 2)}},
+                        {"cid": "person", "title": "Person", "value": {"id": generator.randint(1, 20), "name": "Person", "title": ""}},
+                        {"cid": "timeline", "title": "Timeline", "value": {"from": start.strftime('%Y-%m-%d'), "to": (start + datetime.timedelta(days=generator.randint(1, 14))).strftime('%Y-%m-%d')}}
+                    ]
+                })
+            pulses[board_id] = board_pulses
+        return FakeMondayData(boards, pulses)
+    def save(self, path):
+        recording_file = open(path, "w")
+        json.dump({"boards": self.boards, "pulses": self.pulses}, recording_file)
+        recording_file.close()
+    def board(self, board_id):
+        return next((x for x in self.boards if x["id"] == board_id), None)
+    def pulsePage(self, board_id, page, per_page, order_by_latest):
+        pulses = self.pulses.get(board_id, [])
+        if order_by_latest:
+            pulses = sorted(pulses, key=lambda x: x["pulse"]["updated_at"], reverse=True)
+        return pulses[(page - 1) * per_page:page * per_page]
+    #Applies a move like monday does, moved pulses and their board get a new updated_at
+    def movePulses(self, board_id, pulse_ids, group_id):
+        updated_at = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        with self.lock:
+            for pulse in self.pulses.get(board_id, []):
+                if pulse["pulse"]["id"] in pulse_ids:
+                    pulse["board_meta"]["group_id"] = group_id
+                    pulse["pulse"]["updated_at"] = updated_at
+            board = self.board(board_id)
+            if board != None:
+                board["updated_at"] = updated_at
+
+class FakeMondayRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    ROUTES = [
+        ("get", re.compile(r"^/v1/boards\.json$"), "boards", "handleBoards"),
+        ("get", re.compile(r"^/v1/boards/(\d+)\.json$"), "board", "handleBoard"),
+        ("get", re.compile(r"^/v1/boards/(\d+)/pulses\.json$"), "pulses", "handlePulses"),
+        ("post", re.compile(r"^/v1/boards/(\d+)/pulses/move\.json$"), "move", "handleMove")
+    ]
+    def do_GET(self):
+        self.__route("get")
+    def do_POST(self):
+        self.__route("post")
+    def log_message(self, format, *args):
+        pass
+    def __route(self, request_type):
+        url = urlparse.urlparse(self.path)
+        parameters = dict(urlparse.parse_qsl(url.query))
+        for route_type, pattern, endpoint, handler in self.ROUTES:
+            match = pattern.match(url.path)
+            if route_type == request_type and match != None:
+                self.server.recordRequest(endpoint)
+                if self.server.latency > 0:
+                    time.sleep(self.server.latency)
+                failure = self.server.nextFailure()
+                if failure != None:
+                    return self.__respond(failure[0], {"error": "Injected failure"}, failure[1])
+                return getattr(self, handler)(parameters, *map(int, match.groups()))
+        self.__respond(404, {"error": "Not found"})
+    def handleBoards(self, parameters):
+        self.__respond(200, self.server.data.boards)
+    def handleBoard(self, parameters, board_id):
+        board = self.server.data.board(board_id)
+        self.__respond(200 if board != None else 404, board)
+    def handlePulses(self, parameters, board_id):
+        per_page = int(parameters.get("per_page", 25))
+        if self.server.max_per_page != None:
+            per_page = min(per_page, self.server.max_per_page)
+        order_by_latest = parameters.get("order_by_latest") in ("True", "true", "1")
+        self.__respond(200, self.server.data.pulsePage(board_id, int(parameters.get("page", 1)), per_page, order_by_latest))
+    def handleMove(self, parameters, board_id):
+        pulse_ids = set(map(int, parameters.get("pulse_ids", "").split(",")))
+        self.server.data.movePulses(board_id, pulse_ids, parameters.get("group_id"))
+        self.__respond(201, {"moved": len(pulse_ids)})
+    def __respond(self, status_code, body, headers=None):
+        content = json.dumps(body)
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers if headers != None else {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+#Local stand in for api.monday.com that serves FakeMondayData over the v1 endpoints reset_week uses.
+#Every request waits latency seconds and max_per_page caps the page size like the real api does.
+#failWith makes the next requests fail, to exercise retries
+class FakeMondayServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    def __init__(self, data, port=0, latency=0, max_per_page=None):
+        BaseHTTPServer.HTTPServer.__init__(self, ("127.0.0.1", port), FakeMondayRequestHandler)
+        self.data = data
+        self.latency = latency
+        self.max_per_page = max_per_page
+        self.request_counts = {}
+        self.counts_lock = threading.Lock()
+        self.failures = []
+        self.thread = None
+    def recordRequest(self, endpoint):
+        with self.counts_lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+    #The next count requests are answered with status_code, and a Retry-After header when retry_after is given
+    def failWith(self, status_code, count=1, retry_after=None):
+        headers = {"Retry-After": str(retry_after)} if retry_after != None else {}
+        with self.counts_lock:
+            self.failures += [(status_code, headers)] * count
+    def nextFailure(self):
+        with self.counts_lock:
+            return self.failures.pop(0) if len(self.failures) > 0 else None
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:{}".format(self.server_address[1])
+    #Serves on a background thread and returns the base url to hand to MondayAPI
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self.base_url
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve recorded or synthetic monday v1 responses")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pulses", type=int, default=1000, help="pulses per synthetic board")
+    parser.add_argument("--recording", help="json recording to serve instead of synthetic boards")
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to every request")
+    parser.add_argument("--max-per-page", type=int, default=None)
+    arguments = parser.parse_args()
+    if arguments.recording != None:
+        data = FakeMondayData.fromRecording(arguments.recording)
+    else:
+        data = FakeMondayData.synthetic(dict.fromkeys(["Operations Tasks", "Website Tasks", "Marketing Team Tasks"], arguments.pulses))
+    server = FakeMondayServer(data, arguments.port, arguments.latency, arguments.max_per_page)
+    print("Serving fake monday api on {}".format(server.base_url))
+    server.serve_forever()
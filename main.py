@@ -2,15 +2,283 @@ from flask import Flask
 from flask_restful import Api, Resource, reqparse
 from flask import request
 from flask import jsonify
+from flask import Response
+from flask import current_app
+from collections import OrderedDict
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import StringIO
+import monday
+import monday_rules
+from monday_metrics import metrics
+from monday_events import MondayEventProcessor, MondayEventQueue, parseMondayEvent, verifyMondaySignature
+from monday_snapshot import MondayBoardSnapshot
+from monday_sync import MondayPulseStore
 
+#Every setting can be overridden by an environment variable of the same name
+DEFAULT_CONFIG = {
+    "MONDAY_SERVER": "gunicorn",
+    "MONDAY_BIND": "127.0.0.1:5000",
+    "MONDAY_WORKERS": 2,
+    "MONDAY_THREADS": 4,
+    "MONDAY_KEEPALIVE": 5,
+    "MONDAY_GRACEFUL_TIMEOUT": 30,
+    "MONDAY_REFRESH_INTERVAL": 60,
+    "MONDAY_START_REFRESHER": True,
+    "MONDAY_RULES_PATH": "automation_rules.json",
+    "MONDAY_WEBHOOK_TOKEN": "",
+    "MONDAY_WEBHOOK_SIGNING_SECRET": "",
+    "MONDAY_WEBHOOK_DEBOUNCE": 2,
+    "MONDAY_WEBHOOK_MAX_PENDING": 10000
+}
+MAX_RENDERED_RESPONSES = 256
+MIN_GZIP_SIZE = 1024
 
-app = Flask(__name__)
-api = Api(app)
+def load_config(overrides=None):
+    config = dict(DEFAULT_CONFIG)
+    for key, default in DEFAULT_CONFIG.items():
+        if key in os.environ:
+            value = os.environ[key]
+            if isinstance(default, bool):
+                value = value.lower() in ("1", "true", "yes")
+            elif isinstance(default, int):
+                value = int(value)
+            config[key] = value
+    if overrides != None:
+        config.update(overrides)
+    return config
+
+#Builds the app along with its own monday api and board snapshot. Under an external wsgi server use main:create_app()
+#Without a monday_api one is set up from the credentials in api_key.txt and user_id.txt
+def create_app(config=None, monday_api=None):
+    app = Flask(__name__)
+    app.config.update(load_config(config))
+    #Each refresh fetches the board list, unchanged boards are then served from the pulse store
+    if monday_api == None:
+        api_key, user_id = monday.loadMondayCredentials()
+        monday_api = monday.MondayAPI(api_key, user_id, page_concurrency=4, pulse_store=MondayPulseStore())
+    snapshot = MondayBoardSnapshot(monday_api, refresh_interval=app.config["MONDAY_REFRESH_INTERVAL"])
+    rules = monday_rules.loadRules(app.config["MONDAY_RULES_PATH"]) if os.path.exists(app.config["MONDAY_RULES_PATH"]) else monday_rules.DEFAULT_RULES
+    #Webhook events lead to real moves on monday, so the webhook only exists when requests to it can be authenticated
+    events = None
+    if app.config["MONDAY_WEBHOOK_TOKEN"] != "" or app.config["MONDAY_WEBHOOK_SIGNING_SECRET"] != "":
+        events = MondayEventQueue(MondayEventProcessor(monday_api, rules, snapshot), debounce=app.config["MONDAY_WEBHOOK_DEBOUNCE"], max_pending=app.config["MONDAY_WEBHOOK_MAX_PENDING"])
+    #Rendered bodies of recent requests, keyed by the snapshot version and the full request path
+    app.extensions["monday"] = {"api": monday_api, "snapshot": snapshot, "events": events, "responses": OrderedDict(), "responses_lock": threading.Lock()}
+    api = Api(app)
+    api.add_resource(Boards, "/boards")
+    api.add_resource(BoardPulses, "/boards/<int:board_id>/pulses")
+    api.add_resource(PulseStats, "/stats")
+    app.add_url_rule("/test", "test", test, methods=['GET'])
+    app.add_url_rule("/healthz", "healthz", healthz, methods=['GET'])
+    app.add_url_rule("/readyz", "readyz", readyz, methods=['GET'])
+    app.add_url_rule("/metrics", "metrics", prometheus_metrics, methods=['GET'])
+    if events != None:
+        app.add_url_rule("/webhooks/monday", "monday_webhook", monday_webhook, methods=['POST'])
+        events.start()
+    if app.config["MONDAY_START_REFRESHER"]:
+        snapshot.start()
+    return app
+
+def current_snapshot():
+    return current_app.extensions["monday"]["snapshot"]
+
+#Serves the json built by render from the snapshot. The body is only rendered once per snapshot version and request
+#path, its ETag is a hash of the body itself so that workers with different data never share one. Clients that
+#already have it get a 304 and large bodies are gzipped
+def snapshot_response(render):
+    snapshot = current_snapshot()
+    if not snapshot.ready:
+        return Response(json.dumps({"error": "Snapshot not loaded yet"}), status=503, mimetype="application/json")
+    rendered_responses = current_app.extensions["monday"]["responses"]
+    rendered_responses_lock = current_app.extensions["monday"]["responses_lock"]
+    version = snapshot.version
+    cache_key = (version, request.full_path)
+    with rendered_responses_lock:
+        rendered = rendered_responses.get(cache_key)
+    if rendered == None:
+        body = json.dumps(render(snapshot))
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        compressed = None
+        if len(body) >= MIN_GZIP_SIZE:
+            buffer = StringIO.StringIO()
+            gzip_file = gzip.GzipFile(fileobj=buffer, mode="wb")
+            gzip_file.write(body)
+            gzip_file.close()
+            compressed = buffer.getvalue()
+        rendered = (etag, body, compressed)
+        with rendered_responses_lock:
+            rendered_responses[cache_key] = rendered
+            while len(rendered_responses) > MAX_RENDERED_RESPONSES:
+                rendered_responses.popitem(last=False)
+    etag, body, compressed = rendered
+    if etag in map(lambda x: x.strip(), request.headers.get("If-None-Match", "").split(",")):
+        response = Response(status=304)
+    elif compressed != None and "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = Response(compressed, status=200, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body, status=200, mimetype="application/json")
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+#Pulses whose timeline overlaps [start, end], either bound can be left out
+def pulses_in_range(pulses, start, end):
+    if start != None:
+        pulses = filter(lambda x: x["timeline_to"] != None and x["timeline_to"] >= start, pulses)
+    if end != None:
+        pulses = filter(lambda x: x["timeline_from"] != None and x["timeline_from"] <= end, pulses)
+    return pulses
+
+class Boards(Resource):
+    def get(self):
+        return snapshot_response(lambda snapshot: {"boards": sorted(snapshot.boards.values(), key=lambda x: x["id"])})
+
+#Pulses are ordered by id, cursor is the id of the last pulse on the previous page
+class BoardPulses(Resource):
+    def get(self, board_id):
+        parser = reqparse.RequestParser()
+        parser.add_argument("group", location="args")
+        parser.add_argument("status", location="args")
+        parser.add_argument("start", location="args")
+        parser.add_argument("end", location="args")
+        parser.add_argument("cursor", type=int, location="args")
+        parser.add_argument("limit", type=int, default=100, location="args")
+        args = parser.parse_args()
+        snapshot = current_snapshot()
+        if snapshot.ready and board_id not in snapshot.boards:
+            return {"error": "Board not found"}, 404
+        def render(snapshot):
+            pulses = snapshot.pulses.get(board_id, [])
+            if args["group"] != None:
+                pulses = filter(lambda x: x["group_id"] == args["group"], pulses)
+            if args["status"] != None:
+                pulses = filter(lambda x: x["status"] == args["status"], pulses)
+            pulses = pulses_in_range(pulses, args["start"], args["end"])
+            if args["cursor"] != None:
+                pulses = filter(lambda x: x["id"] > args["cursor"], pulses)
+            limit = max(1, min(args["limit"], 1000))
+            page = pulses[:limit]
+            return {"pulses": page, "next_cursor": page[-1]["id"] if len(pulses) > limit else None}
+        return snapshot_response(render)
+
+#Counts of the pulses whose timeline overlaps start/end per board, group and status
+class PulseStats(Resource):
+    def get(self):
+        start = request.args.get('start', None)
+        end = request.args.get('end', None)
+        def render(snapshot):
+            boards = []
+            for board_id, pulses in sorted(snapshot.pulses.items()):
+                groups = {}
+                statuses = {}
+                pulses = pulses_in_range(pulses, start, end)
+                for pulse in pulses:
+                    groups[pulse["group_id"]] = groups.get(pulse["group_id"], 0) + 1
+                    statuses[pulse["status"] or "None"] = statuses.get(pulse["status"] or "None", 0) + 1
+                boards.append({"board_id": board_id, "name": snapshot.boards[board_id]["name"], "pulses": len(pulses), "groups": groups, "statuses": statuses})
+            return {"start": start, "end": end, "boards": boards}
+        return snapshot_response(render)
 
-@app.route("/test", methods=['GET'])
 def test():
     start = request.args.get('start', None)
     end = request.args.get('end', None)
     return jsonify({"start":start, "end":end, "data":"success"}), 200
 
-app.run(debug=True)
\ No newline at end of file
+def healthz():
+    return jsonify({"status": "ok"}), 200
+
+#Ready once the first snapshot has loaded, before that the data endpoints answer 503
+def readyz():
+    snapshot = current_snapshot()
+    if not snapshot.ready:
+        return jsonify({"ready": False}), 503
+    return jsonify({"ready": True, "version": snapshot.version, "refreshed_at": snapshot.refreshed_at}), 200
+
+#Prometheus scrape endpoint for the requests, pages, model building and automation steps of this process
+def prometheus_metrics():
+    snapshot = current_snapshot()
+    metrics.setGauge("monday_snapshot_version", snapshot.version)
+    metrics.setGauge("monday_snapshot_age_seconds", time.time() - snapshot.refreshed_at if snapshot.refreshed_at != None else -1)
+    events = current_app.extensions["monday"]["events"]
+    metrics.setGauge("monday_webhook_pending_pulses", events.size() if events != None else 0)
+    return Response(metrics.prometheus(), status=200, mimetype="text/plain; version=0.0.4")
+
+#Receives monday's change events. The challenge monday sends when the webhook is created is echoed back, events
+#are queued and applied to the snapshot once the pulse settles. The webhook is only registered when at least one
+#of MONDAY_WEBHOOK_TOKEN (the webhook url has to carry it as ?token=) and MONDAY_WEBHOOK_SIGNING_SECRET (monday's
+#signed Authorization header is verified with it) is set, every one that is set has to pass. Under gunicorn each
+#event only reaches the worker that received it, the others pick the change up on their next refresh
+def monday_webhook():
+    token = current_app.config["MONDAY_WEBHOOK_TOKEN"]
+    if token != "" and not hmac.compare_digest(str(request.args.get("token", "")), str(token)):
+        return jsonify({"error": "Invalid token"}), 403
+    secret = current_app.config["MONDAY_WEBHOOK_SIGNING_SECRET"]
+    if secret != "" and not verifyMondaySignature(request.headers.get("Authorization", ""), secret):
+        return jsonify({"error": "Invalid signature"}), 403
+    payload = request.get_json(force=True, silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a json object"}), 400
+    if "challenge" in payload:
+        return jsonify({"challenge": payload["challenge"]}), 200
+    event = parseMondayEvent(payload)
+    if event == None:
+        return jsonify({"queued": False}), 200
+    if not current_app.extensions["monday"]["events"].put(*event):
+        return jsonify({"error": "Too many pending events"}), 503
+    return jsonify({"queued": True}), 202
+
+def stop_app(app):
+    app.extensions["monday"]["snapshot"].stop()
+    if app.extensions["monday"]["events"] != None:
+        app.extensions["monday"]["events"].stop()
+
+#Runs the app under the server picked by MONDAY_SERVER. gunicorn runs MONDAY_WORKERS processes with MONDAY_THREADS
+#threads each, waitress and werkzeug run a single process with MONDAY_THREADS threads (werkzeug with a thread per
+#request when that is more than 1). Only gunicorn shuts down gracefully: on SIGTERM it lets in flight requests
+#finish within MONDAY_GRACEFUL_TIMEOUT. Under waitress and werkzeug SIGTERM stops the background threads and exits
+#right away, dropping requests that are still in flight
+def serve(overrides=None):
+    config = load_config(overrides)
+    host, port = config["MONDAY_BIND"].rsplit(":", 1)
+    if config["MONDAY_SERVER"] == "gunicorn":
+        from gunicorn.app.base import BaseApplication
+        class MondayGunicornApplication(BaseApplication):
+            def load_config(self):
+                self.cfg.set("bind", config["MONDAY_BIND"])
+                self.cfg.set("workers", config["MONDAY_WORKERS"])
+                self.cfg.set("threads", config["MONDAY_THREADS"])
+                self.cfg.set("worker_class", "gthread")
+                self.cfg.set("keepalive", config["MONDAY_KEEPALIVE"])
+                self.cfg.set("graceful_timeout", config["MONDAY_GRACEFUL_TIMEOUT"])
+                self.cfg.set("worker_exit", lambda server, worker: stop_app(worker.wsgi))
+            #Each worker builds its own app after the fork so its refresher thread runs in that worker
+            def load(self):
+                return create_app(overrides)
+        MondayGunicornApplication().run()
+        return
+    app = create_app(overrides)
+    def shutdown(signum, frame):
+        stop_app(app)
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, shutdown)
+    if config["MONDAY_SERVER"] == "waitress":
+        import waitress
+        waitress.serve(app, host=host, port=int(port), threads=config["MONDAY_THREADS"], channel_timeout=config["MONDAY_GRACEFUL_TIMEOUT"])
+    elif config["MONDAY_SERVER"] == "werkzeug":
+        from werkzeug.serving import run_simple
+        run_simple(host, int(port), app, threaded=config["MONDAY_THREADS"] > 1)
+    else:
+        raise Exception("Unknown server {}".format(config["MONDAY_SERVER"]))
+    stop_app(app)
+
+if __name__ == "__main__":
+    serve()
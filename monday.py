@@ -1,9 +1,27 @@
 import json
-import requests
 import re
+import threading
+import time
 from itertools import ifilter
+from multiprocessing.pool import ThreadPool
+import monday_json
+from monday_transport import MondayTransport
+from monday_cache import MondayCache
+from monday_metrics import metrics, endpointLabel
+from monday_sync import MondayPulseSync
 
-class MondayUser:
+#Reads the api key and user id from the first line of each file
+def loadMondayCredentials(api_key_path="api_key.txt", user_id_path="user_id.txt"):
+    api_key_file = open(api_key_path, "r")
+    api_key = api_key_file.readline().rstrip("\n")
+    api_key_file.close()
+    user_id_file = open(user_id_path, "r")
+    user_id = user_id_file.readline().rstrip("\n")
+    user_id_file.close()
+    return api_key, user_id
+
+class MondayUser(object):
+    __slots__ = ("name", "id", "title", "email")
     def __init__(self, monday_user_json):
         if monday_user_json == None:
             self.name = None
@@ -18,10 +36,14 @@ class MondayUser:
     def __str__(self):
         return "{}: {}".format(self.name, self.title)
 
-class MondayPulse:
+#Shared column title strings, the same titles show up on every pulse of a board
+column_titles = {}
+
+#Pulses only keep a reference to the raw column values, the title index and the typed columns are built on first use
+class MondayPulse(object):
+    __slots__ = ("id", "name", "created_on", "updated_on", "board_id", "url", "group_id", "raw_column_values", "column_index", "columns", "decoded_columns")
     def __init__(self, monday_pulse_json, type_dictionary):
         board_meta_data = monday_pulse_json["board_meta"]
-        column_values = monday_pulse_json["column_values"]
         pulse = monday_pulse_json["pulse"]
         self.id = pulse["id"]
         self.name = pulse["name"]
@@ -30,30 +52,84 @@ class MondayPulse:
         self.board_id = pulse["board_id"]
         self.url = pulse["url"]
         self.group_id = board_meta_data["group_id"]
-        self.column_values = {}
-        for column_value in column_values:
-            self.column_values[column_value["title"]] = column_value
+        self.raw_column_values = monday_pulse_json["column_values"]
+        self.column_index = None
+        self.columns = type_dictionary
+        self.decoded_columns = None
+    #Raw column values keyed by their title, the titles are interned so every pulse shares the same strings
+    @property
+    def column_values(self):
+        if self.column_index == None:
+            self.column_index = {}
+            for column_value in self.raw_column_values:
+                column_value["title"] = column_titles.setdefault(column_value["title"], column_value["title"])
+                self.column_index[column_value["title"]] = column_value
+        return self.column_index
+    #Returns the column with the given title decoded through the board's column types, it is only decoded once
+    def column(self, title):
+        if self.decoded_columns == None:
+            self.decoded_columns = {}
+        decoded = self.decoded_columns.get(title)
+        if decoded == None:
+            decoded = self.columns[title](self.column_values[title])
+            self.decoded_columns[title] = decoded
+        return decoded
     def __str__(self):
         return "{}({}): created on: {}, updated on: {}".format(self.name, self.id, self.created_on, self.updated_on)
 
-class MondayBoard:
-    def __init__(self, monday_board_json, monday_api):
+#The parsed columns and groups of a board as of its updated_at, shared by every MondayBoard built from the same
+#version of the board
+class MondayBoardSchema(object):
+    __slots__ = ("updated_at", "columns", "column_definitions", "groups", "groups_by_title")
+    def __init__(self, monday_board_json):
+        self.updated_at = monday_board_json["updated_at"]
+        self.columns = parse_monday_column_types(monday_board_json["columns"])
+        self.column_definitions = dict(map(lambda x: (x["title"], x), monday_board_json["columns"]))
+        self.groups = filter(lambda x: not (x.archived or x.deleted), map(lambda x: MondayBoardGroup(x, monday_board_json["id"]), monday_board_json["groups"]))
+        self.groups_by_title = dict(map(lambda x: (x.title, x), reversed(self.groups)))
+
+class MondayBoard(object):
+    __slots__ = ("url", "id", "name", "description", "columns", "board_type", "groups", "created_at", "updated_at", "api", "groups_by_title", "column_definitions")
+    #schema is parsed from the board json when it is not given
+    def __init__(self, monday_board_json, monday_api, schema=None):
+        if schema == None:
+            schema = MondayBoardSchema(monday_board_json)
         self.url = monday_board_json["url"]
         self.id = monday_board_json["id"]
         self.name = monday_board_json["name"]
         self.description = monday_board_json["description"]
-        self.columns = parse_monday_column_types(monday_board_json["columns"])
+        self.columns = schema.columns
+        self.column_definitions = schema.column_definitions
         self.board_type = monday_board_json["board_kind"]
-        self.groups = filter(lambda x: not (x.archived or x.deleted), map(lambda x: MondayBoardGroup(x, self.id), monday_board_json["groups"]))
+        self.groups = schema.groups
+        self.groups_by_title = schema.groups_by_title
         self.created_at = monday_board_json["created_at"]
         self.updated_at = monday_board_json["updated_at"]
         self.api = monday_api
-    #Gets all of the pulses in the board
+    #Gets all of the pulses in the board, served from the api's pulse store when it has one
     def getPulses(self):
-        raw_pulses = self.api.getBoardPulses(self.id)
-        return map(lambda x: MondayPulse(x, self.columns), raw_pulses)
+        if self.api.sync != None:
+            raw_pulses = self.api.sync.pulsesForBoard(self)
+        else:
+            raw_pulses = self.api.getBoardPulses(self.id)
+        return buildMondayPulses(raw_pulses, self.columns)
+    #Yields the pulses of the board one page at a time instead of building the whole list first, so without a pulse
+    #store peak memory is bounded by the page size. With a store the raw board is already in memory as a whole,
+    #the pulses are then built one at a time straight from it
+    def iterPulses(self):
+        if self.api.sync != None:
+            raw_pulses = self.api.sync.pulsesForBoard(self)
+            metrics.increment("monday_models_built_total", {"model": "pulse"}, len(raw_pulses))
+            for raw_pulse in raw_pulses:
+                yield MondayPulse(raw_pulse, self.columns)
+            return
+        for page in self.api.iterBoardPulsePages(self.id):
+            for pulse in buildMondayPulses(page, self.columns):
+                yield pulse
+    def groupNamed(self, group_name):
+        return self.groups_by_title.get(group_name)
     def movePulsesToGroup(self, pulses, group_name):
-        group = next(ifilter(lambda x: x.title == group_name, self.groups), None)
+        group = self.groupNamed(group_name)
         if group == None:
             raise Exception("No group exists")
         self.api.movePulsesToGroup(self.id, map(lambda x: x.id, pulses), group.id)
@@ -62,6 +138,32 @@ class MondayBoard:
     def __str__(self):
         return "{}: {}".format(self.name, self.description)
 
+#Builds the MondayPulses of raw pulses, timing how long it takes
+def buildMondayPulses(raw_pulses, columns):
+    with metrics.span("monday_model_build_seconds", {"model": "pulse"}):
+        pulses = map(lambda x: MondayPulse(x, columns), raw_pulses)
+    metrics.increment("monday_models_built_total", {"model": "pulse"}, len(pulses))
+    return pulses
+
+#Streaming filters, each takes any iterable of pulses and lazily yields the ones that match
+def filterPulsesInGroup(pulses, group_id):
+    return ifilter(lambda x: x.group_id == group_id, pulses)
+
+def filterPulsesWithStatus(pulses, status, column_title="Status"):
+    return ifilter(lambda x: x.column_values[column_title].get("value", None) != None and x.column(column_title).value == status, pulses)
+
+#Yields the pulses whose timeline starts in [start, end), either bound can be left out.
+#Bounds are dates or 'YYYY-MM-DD' strings, which compare the same way as the timeline values
+def filterPulsesInTimeline(pulses, start=None, end=None, column_title="Timeline"):
+    start = start.strftime('%Y-%m-%d') if hasattr(start, "strftime") else start
+    end = end.strftime('%Y-%m-%d') if hasattr(end, "strftime") else end
+    def in_window(pulse):
+        value = pulse.column_values[column_title]["value"]
+        if value == None:
+            return False
+        return (start == None or value["from"] >= start) and (end == None or value["from"] < end)
+    return ifilter(in_window, pulses)
+
 #returns a dictionary of column id's to the type
 def parse_monday_column_types(columns):
     dictionary = {}
@@ -69,71 +171,46 @@ def parse_monday_column_types(columns):
         dictionary[column["title"]] = mondayColumnInitializerForType(column)
     return dictionary
     
+#Returns the initializer that decodes a pulse's value of the column, unknown types decode to MondayRawColumn
 def mondayColumnInitializerForType(column):
-    if column["type"] == "name":
-        return lambda x: MondayNameColumn(x)
-    elif column["type"] == "person":
-        return lambda x: MondayPersonColumn(x)
-    elif column["type"] == "team":
-        return lambda x: MondayTeamColumn(x)
-    elif column["type"] == "color":
-        return lambda x: MondayColorColumn(x, column["labels"])
-    elif column["type"] == "timerange":
-        return lambda x: MondayTimelineColumn(x)
-    elif column["type"] == "tag":
-        return lambda x: MondayTagColumn(x)
-    elif column["type"] == "date":
-        return lambda x: MondayDateColumn(x)
-    elif column["type"] == "boolean":
-        return lambda x: MondayBooleanColumn(x)
-    elif column["type"] == "file":
-        return lambda x: MondayFileColumn(x)
-    elif column["type"] == "numeric":
-        return lambda x: MondayNumericColumn(x)
-    elif column["type"] == "text":
-        return lambda x: MondayTextColumn(x)
-    elif column["type"] == "multiple-person":
-        return lambda x: MondayMultiplePersonColumn(x)
-    elif column["type"] == "formula":
-        return lambda x: MondayFormulaColumn(x)
-    elif column["type"] == "link":
-        return lambda x: MondayLinkColumn(x)
-    elif column["type"] == "votes":
-        return lambda x: MondayVotesColumn(x)
-    else:
-        raise Exception("Unknown column type {}".format(column["type"]))
+    value_class = MONDAY_COLUMN_TYPES.get(column["type"], MONDAY_FALLBACK_COLUMN_TYPE)[0]
+    return lambda x: value_class(x, column)
 
+#Parses a column definition from the columns endpoint, unknown types parse to MondayColumnDefinition
 def parseMondayColumn(column):
-    if column["type"] == "name":
-        return MondayNameColumn(column)
-    elif column["type"] == "person":
-        return MondayPersonColumn(column)
-    elif column["type"] == "team":
-        return MondayTeamColumn(column)
-    elif column["type"] == "color":
-        return MondayColorColumn(column)
-    elif column["type"] == "timerange":
-        return MondayTimelineColumn(column)
-    elif column["type"] == "tag":
-        return MondayTagColumn(column)
-    elif column["type"] == "date":
-        return MondayDateColumn(column)
-    elif column["type"] == "boolean":
-        return MondayBooleanColumn(column)
-    elif column["type"] == "file":
-        return MondayFileColumn(column)
-    elif column["type"] == "numeric":
-        return MondayNumericColumn(column)
-    elif column["type"] == "text":
-        return MondayTextColumn(column)
-    elif column["type"] == "multiple-person":
-        return MondayMultiplePersonColumn(column)
-    elif column["type"] == "formula":
-        return MondayFormulaColumn(column)
-    else:
-        raise Exception("Unknown column type {}".format(column["type"]))
-
-class MondayBoardGroup:
+    return MONDAY_COLUMN_TYPES.get(column["type"], MONDAY_FALLBACK_COLUMN_TYPE)[1](column)
+
+#Adds or replaces the classes used for a column type. value_class is called with a pulse's column value and the
+#board's column definition, definition_class with the column definition
+def registerMondayColumnType(column_type, value_class, definition_class=None):
+    MONDAY_COLUMN_TYPES[column_type] = (value_class, definition_class if definition_class != None else MondayColumnDefinition)
+
+#Decodes one column of many pulses at once, every pulse's decoded value is memoized like MondayPulse.column does.
+#Each pulse is decoded with its own board's column types, so pulses of several boards can be mixed. Pulses without
+#the column decode to None
+def decodeMondayColumn(pulses, title):
+    with metrics.span("monday_model_build_seconds", {"model": "column"}):
+        decoded = decode_monday_column(pulses, title)
+    metrics.increment("monday_models_built_total", {"model": "column"}, len(decoded))
+    return decoded
+
+def decode_monday_column(pulses, title):
+    decoded = []
+    for pulse in pulses:
+        if title not in pulse.column_values:
+            decoded.append(None)
+            continue
+        if pulse.decoded_columns == None:
+            pulse.decoded_columns = {}
+        value = pulse.decoded_columns.get(title)
+        if value == None:
+            value = pulse.columns[title](pulse.column_values[title])
+            pulse.decoded_columns[title] = value
+        decoded.append(value)
+    return decoded
+
+class MondayBoardGroup(object):
+    __slots__ = ("color", "board_id", "id", "title", "archived", "deleted")
     def __init__(self, monday_board_json, board_id):
         self.color = monday_board_json["color"]
         self.board_id = monday_board_json["board_id"] if board_id is None else board_id
@@ -144,44 +221,50 @@ class MondayBoardGroup:
     def __str__(self):
         return "{}({})".format(self.title, self.id)
 
-class MondayNameColumn:
-    def __init__(self, monday_column_json):
+class MondayNameColumn(object):
+    __slots__ = ("cid", "title", "name")
+    def __init__(self, monday_column_json, column=None):
         self.cid = monday_column_json["cid"]
         self.title = monday_column_json["title"]
         self.name = monday_column_json["name"]
     def __str__(self):
         return "{}({}): {}".format(self.title, self.cid, self.name)
 
-class MondayPersonColumn:
-    def __init__(self, monday_column_json):
+class MondayPersonColumn(object):
+    __slots__ = ("cid", "title", "person")
+    def __init__(self, monday_column_json, column=None):
         self.cid = monday_column_json["cid"]
         self.title = monday_column_json["title"]
         self.person = MondayUser(monday_column_json["value"])
     # def __str__(self):
     #     return "{}({}):{}".format(self.title, self.id, self.type)
     
-class MondayTeamColumn:
-    def __init__(self, monday_column_json):
+class MondayTeamColumn(object):
+    __slots__ = ("cid", "title", "value")
+    def __init__(self, monday_column_json, column=None):
         self.cid = monday_column_json["cid"]
         self.title = monday_column_json["title"]
         self.value = monday_column_json["value"]
     # def __str__(self):
     #     return "{}({}):{}".format(self.title, self.id, self.type)
 
-class MondayColorColumn:
-    def __init__(self, monday_column_json, column_index_values):
+class MondayColorColumn(object):
+    __slots__ = ("cid", "title", "value")
+    def __init__(self, monday_column_json, column):
+        column_index_values = column.get("labels", {})
         self.cid = monday_column_json["cid"]
         self.title = monday_column_json["title"]
         self.value = monday_column_json["value"]
         if self.value != None:
-            self.value = column_index_values[str(self.value["index"])] if self.value.get("index", None) != None else self.value
+            self.value = column_index_values.get(str(self.value["index"])) if self.value.get("index", None) != None else self.value
         else:
             self.value = "None"
     # def __str__(self):
     #     labels = "[" + reduce(lambda x, y: x + ", " + y, self.labels.values()) + "]"
     #     return "{}({}):{} {}".format(self.title, self.id, self.type, labels)
 
-class MondayTimelineValue:
+class MondayTimelineValue(object):
+    __slots__ = ("start", "end")
     def __init__(self, timeline_json):
         if timeline_json != None:
             self.start = timeline_json["from"]
@@ -192,15 +275,17 @@ class MondayTimelineValue:
     def __str__(self):
         return "start: {}, end: {}".format(self.start, self.end)
 
-class MondayTimelineColumn:
-    def __init__(self, monday_column_json):
+class MondayTimelineColumn(object):
+    __slots__ = ("cid", "title", "value")
+    def __init__(self, monday_column_json, column=None):
         self.cid = monday_column_json["cid"]
         self.title = monday_column_json["title"]
         self.value = MondayTimelineValue(monday_column_json["value"])
     # def __str__(self):
     #     return "{}({}):{}".format(self.title, self.id, self.type)
 
-class MondayTagColumn:
+class MondayTagColumn(object):
+    __slots__ = ("type", "title", "id")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "tag":
             raise Exception("Incorrect json provided")
@@ -210,7 +295,8 @@ class MondayTagColumn:
     def __str__(self):
         return "{}({}):{}".format(self.title, self.id, self.type)
     
-class MondayDateColumn:
+class MondayDateColumn(object):
+    __slots__ = ("type", "title", "id")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "date":
             raise Exception("Incorrect json provided")
@@ -220,7 +306,8 @@ class MondayDateColumn:
     def __str__(self):
         return "{}({}):{}".format(self.title, self.id, self.type)
 
-class MondayBooleanColumn:
+class MondayBooleanColumn(object):
+    __slots__ = ("type", "title", "id")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "boolean":
             raise Exception("Incorrect json provided")
@@ -230,7 +317,8 @@ class MondayBooleanColumn:
     def __str__(self):
         return "{}({}):{}".format(self.title, self.id, self.type)
 
-class MondayFileColumn:
+class MondayFileColumn(object):
+    __slots__ = ("type", "title", "id")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "file":
             raise Exception("Incorrect json provided")
@@ -240,7 +328,8 @@ class MondayFileColumn:
     def __str__(self):
         return "{}({}):{}".format(self.title, self.id, self.type)
 
-class MondayNumericColumn:
+class MondayNumericColumn(object):
+    __slots__ = ("type", "title", "id", "unit_symbol")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "numeric":
             raise Exception("Incorrect json provided")
@@ -251,7 +340,8 @@ class MondayNumericColumn:
     def __str__(self):
         return "{}({}):{} (Unit: ".format(self.title, self.id, self.type) + self.unit_symbol + ")"
 
-class MondayTextColumn:
+class MondayTextColumn(object):
+    __slots__ = ("type", "title", "id")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "text":
             raise Exception("Incorrect json provided")
@@ -261,7 +351,8 @@ class MondayTextColumn:
     def __str__(self):
         return "{}({}):{}".format(self.title, self.id, self.type)
 
-class MondayMultiplePersonColumn:
+class MondayMultiplePersonColumn(object):
+    __slots__ = ("type", "title", "id")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "multiple-person":
             raise Exception("Incorrect json provided")
@@ -271,7 +362,8 @@ class MondayMultiplePersonColumn:
     def __str__(self):
         return "{}({}):{}".format(self.title, self.id, self.type)
 
-class MondayFormulaColumn:
+class MondayFormulaColumn(object):
+    __slots__ = ("type", "title", "id", "formula", "unit_symbol")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "formula":
             raise Exception("Incorrect json provided")
@@ -283,7 +375,8 @@ class MondayFormulaColumn:
     def __str__(self):
         return "{}({}):{} (formula: {}, units: {})".format(self.title, self.id, self.type, self.formula, self.unit_symbol)
 
-class MondayLinkColumn:
+class MondayLinkColumn(object):
+    __slots__ = ("type", "title", "id")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "link":
             raise Exception("Incorrect json provided")
@@ -293,24 +386,66 @@ class MondayLinkColumn:
     def __str__(self):
         return "{}({}):{}".format(self.title, self.id, self.type)
 
-class MondayVotesColumn:
+class MondayVotesColumn(object):
+    __slots__ = ("type", "title", "id")
     def __init__(self, monday_column_json):
         if monday_column_json["type"] != "votes":
             raise Exception("Incorrect json provided")
         self.type = "votes"
-        elf.title = monday_column_json["title"]
+        self.title = monday_column_json["title"]
         self.id = monday_column_json["id"]
     def __str__(self):
         return "{}({}):{}".format(self.title, self.id, self.type)
 
+#Value of a column type without its own class, keeps the raw value as monday sent it
+class MondayRawColumn(object):
+    __slots__ = ("cid", "title", "value")
+    def __init__(self, monday_column_json, column=None):
+        self.cid = monday_column_json.get("cid")
+        self.title = monday_column_json["title"]
+        self.value = monday_column_json.get("value")
+    def __str__(self):
+        return "{}({}): {}".format(self.title, self.cid, self.value)
+
+class MondayColumnDefinition(object):
+    __slots__ = ("type", "title", "id")
+    def __init__(self, monday_column_json):
+        self.type = monday_column_json["type"]
+        self.title = monday_column_json["title"]
+        self.id = monday_column_json["id"]
+    def __str__(self):
+        return "{}({}):{}".format(self.title, self.id, self.type)
+
+#Column types mapped to the class that decodes a pulse's value of that column and the class that parses the
+#column's definition
+MONDAY_COLUMN_TYPES = {
+    "name": (MondayNameColumn, MondayColumnDefinition),
+    "person": (MondayPersonColumn, MondayColumnDefinition),
+    "team": (MondayTeamColumn, MondayColumnDefinition),
+    "color": (MondayColorColumn, MondayColumnDefinition),
+    "timerange": (MondayTimelineColumn, MondayColumnDefinition),
+    "tag": (MondayRawColumn, MondayTagColumn),
+    "date": (MondayRawColumn, MondayDateColumn),
+    "boolean": (MondayRawColumn, MondayBooleanColumn),
+    "file": (MondayRawColumn, MondayFileColumn),
+    "numeric": (MondayRawColumn, MondayNumericColumn),
+    "text": (MondayRawColumn, MondayTextColumn),
+    "multiple-person": (MondayRawColumn, MondayMultiplePersonColumn),
+    "formula": (MondayRawColumn, MondayFormulaColumn),
+    "link": (MondayRawColumn, MondayLinkColumn),
+    "votes": (MondayRawColumn, MondayVotesColumn)
+}
+MONDAY_FALLBACK_COLUMN_TYPE = (MondayRawColumn, MondayColumnDefinition)
+
 #TODO: Create a class for columns and groups
 
 class MondayAPIOLD:
     #Creates the instance of the monday api with the given api key and the user id that things will be used with
-    def __init__(self, key, user_id):
+    def __init__(self, key, user_id, transport=None):
         self.key = key
         self.user_id = user_id
         self.base_url = "https://api.monday.com"
+        self.transport = transport if transport != None else MondayTransport()
     #Returns a list of all of the users on the Monday
     def getUsers(self):
         extension = "/v1/users.json"
@@ -354,90 +489,262 @@ class MondayAPIOLD:
     def __perform_request__(self, extension, parameters, request_type):
         parameters["api_key"] = self.key
         parameters["user_id"] = self.user_id
-        if request_type == "get":
-            response = requests.get(url = self.base_url + extension, params = parameters)
-            return self.__handle_monday_response(response)
-        elif request_type == "post":
-            response = requests.post(url = self.base_url + extension, params = parameters)
-            return self.__handle_monday_response(response)
-        elif request_type == "put":
-            response = requests.put(url = self.base_url + extension, params = parameters)
-            return self.__handle_monday_response(response)
-        elif request_type == "delete":
-            response = requests.delete(url = self.base_url + extension, params = parameters)
-            return self.__handle_monday_response(response)
-        else:
-            raise Exception("Invalid request type")
+        response = self.transport.request(request_type, self.base_url + extension, parameters)
+        return self.__handle_monday_response(response)
     def __handle_monday_response(self, response):
         if response.status_code == 200:
-            return response.json()
+            return monday_json.loads(response.content)
         elif response.status_code == 401:
             raise Exception("invalid API key")
         elif response.status_code == 402:
             raise Exception("Monday payment required")
         elif response.status_code == 404:
             raise Exception("Resource not found")
+        elif response.status_code == 429:
+            raise Exception("Monday rate limit exceeded")
         else:
             raise Exception("Unexpected status code {}".format(response.status_code))
 
 class MondayAPI:
     #Creates the instance of the monday api with the given api key and the user id that things will be used with
-    def __init__(self, key, user_id):
+    #page_size is the number of pulses requested per page and page_concurrency is the number of pages fetched at once
+    #max_page_size is the most pulses the server returns per page, larger page sizes are lowered to it so that a
+    #page shorter than the page size really is the last one
+    #transport can be shared between api instances, by default each instance gets its own pooled session
+    #cache holds board metadata, by default it only lives in memory for the lifetime of the instance. The parsed
+    #columns and groups of each board are kept in memory too and only parsed again when the board's updated_at changes
+    #when a pulse_store is given board pulses are synced incrementally into it instead of being refetched
+    #base_url can point at another server that speaks the v1 api, like fake_monday.py
+    def __init__(self, key, user_id, page_size=25, page_concurrency=1, transport=None, cache=None, pulse_store=None, base_url="https://api.monday.com", max_page_size=25):
         self.key = key
         self.user_id = user_id
-        self.base_url = "https://api.monday.com"
-    #Gets all of the boards that are not archived or deleted
+        self.base_url = base_url
+        self.transport = transport if transport != None else MondayTransport(pool_size=max(10, page_concurrency))
+        self.cache = cache if cache != None else MondayCache()
+        self.board_schemas = {}
+        self.board_schemas_lock = threading.Lock()
+        self.sync = MondayPulseSync(self, pulse_store) if pulse_store != None else None
+        self.max_page_size = max_page_size
+        self.page_size = min(page_size, max_page_size)
+        self.page_concurrency = page_concurrency
+        self.move_chunk_size = 100
+    #Gets all of the boards that are not archived or deleted. With a pulse store the board list and boards are always
+    #fetched, since the store decides whether a board's pulses changed from its updated_at, and only groups and
+    #columns are served from the cache
     def getBoards(self):
-        extension = "/v1/boards.json"
-        result = self.__perform_request__(extension, {}, "get")
-        return map(lambda x: MondayBoard(x, self), result)
+        result = self.cache.get("boards", "all") if self.sync == None else None
+        if result == None:
+            extension = "/v1/boards.json"
+            result = self.__perform_request__(extension, {}, "get")
+            self.cache.set("boards", "all", result)
+            for board in result:
+                self.__cache_board(board)
+        return map(lambda x: MondayBoard(x, self, self.__board_schema(x)), result)
+    def getBoard(self, board_id):
+        result = self.cache.get("board", board_id) if self.sync == None else None
+        if result == None:
+            extension = "/v1/boards/{}.json".format(board_id)
+            result = self.__perform_request__(extension, {}, "get")
+            self.__cache_board(result)
+        return MondayBoard(result, self, self.__board_schema(result))
+    #Returns the raw groups of the board
+    def getBoardGroups(self, board_id):
+        result = self.cache.get("groups", board_id)
+        if result == None:
+            extension = "/v1/boards/{}/groups.json".format(board_id)
+            result = self.__perform_request__(extension, {"show_archived":False, "show_deleted":False}, "get")
+            self.cache.set("groups", board_id, result)
+        return result
+    #Returns the raw column definitions of the board
+    def getBoardColumns(self, board_id):
+        result = self.cache.get("columns", board_id)
+        if result == None:
+            extension = "/v1/boards/{}/columns.json".format(board_id)
+            result = self.__perform_request__(extension, {"all_columns":False}, "get")
+            self.cache.set("columns", board_id, result)
+        return result
     def getBoardNamed(self, board_name):
         boards_matching = filter(lambda x: x.name == board_name, self.getBoards())
         if len(boards_matching) == 0:
             raise Exception("No board with that name")
         return boards_matching[0]
     #Gets the pulses for the board with the given id
-    def getBoardPulses(self, board_id):
+    def getBoardPulses(self, board_id, per_page=None, concurrency=None):
+        result = []
+        for page in self.iterBoardPulsePages(board_id, per_page, concurrency):
+            result += page
+        return result
+    #Yields the pages of pulses for the board with the given id as they arrive.
+    #When concurrency is more than 1 the pages are fetched speculatively in windows of that many pages,
+    #the pages are still yielded in order and everything after the first short page is dropped
+    def iterBoardPulsePages(self, board_id, per_page=None, concurrency=None):
+        per_page = self.page_size if per_page is None else min(per_page, self.max_page_size)
+        concurrency = self.page_concurrency if concurrency is None else concurrency
+        extension = "/v1/boards/{}/pulses.json".format(board_id)
+        fetch_page = lambda page: self.__perform_request__(extension, {"per_page": per_page, "page": page}, "get")
+        pages = 0
+        try:
+            if concurrency <= 1:
+                current_page = 1
+                while True:
+                    tmp = fetch_page(current_page)
+                    pages += 1
+                    yield tmp
+                    if len(tmp) < per_page:
+                        return
+                    current_page += 1
+            pool = ThreadPool(concurrency)
+            try:
+                current_page = 1
+                while True:
+                    fetched = pool.map(fetch_page, range(current_page, current_page + concurrency))
+                    for tmp in fetched:
+                        pages += 1
+                        yield tmp
+                        if len(tmp) < per_page:
+                            return
+                    current_page += concurrency
+            finally:
+                pool.terminate()
+        finally:
+            metrics.increment("monday_pages_total", {"board_id": board_id, "kind": "full"}, pages)
+            metrics.observe("monday_pages_per_board", pages, {"kind": "full"})
+    #Gets the pulses of the board updated at or after the given updated_at, newest first.
+    #Pages are requested until one reaches pulses older than updated_at
+    def getBoardPulsesUpdatedSince(self, board_id, updated_at, per_page=None):
+        per_page = self.page_size if per_page is None else min(per_page, self.max_page_size)
         extension = "/v1/boards/{}/pulses.json".format(board_id)
-        result = self.__perform_request__(extension, {"per_page": 25, "page": 1}, "get")
-        current_page = 2
-        tmp = result
-        while(len(tmp) == 25):
-            tmp = self.__perform_request__(extension, {"per_page": 25, "page": current_page}, "get")
+        result = []
+        current_page = 1
+        while True:
+            tmp = self.__perform_request__(extension, {"per_page": per_page, "page": current_page, "order_by_latest": True}, "get")
+            newer = filter(lambda x: updated_at == None or x["pulse"]["updated_at"] >= updated_at, tmp)
+            result += newer
+            if len(tmp) < per_page or len(newer) < len(tmp):
+                metrics.increment("monday_pages_total", {"board_id": board_id, "kind": "updated_since"}, current_page)
+                metrics.observe("monday_pages_per_board", current_page, {"kind": "updated_since"})
+                return result
             current_page += 1
-            result += tmp
-        return result
+    #Moves the pulses in requests of at most move_chunk_size ids, returns the response of each request
     def movePulsesToGroup(self, board_id, pulse_ids, group_id):
         extension = "/v1/boards/{}/pulses/move.json".format(board_id)
-        ids = reduce(lambda x,y: "{},{}".format(x,y), pulse_ids)
-        result = self.__perform_request__(extension, {"group_id":group_id, "pulse_ids":ids}, "post")
+        pulse_ids = list(pulse_ids)
+        if len(pulse_ids) == 0:
+            return []
+        results = []
+        for start in range(0, len(pulse_ids), self.move_chunk_size):
+            ids = ",".join(map(str, pulse_ids[start:start + self.move_chunk_size]))
+            results.append(self.__perform_request__(extension, {"group_id":group_id, "pulse_ids":ids}, "post"))
+        #Moving pulses changes the board's updated_at, the groups and columns are unaffected
+        self.cache.invalidate("boards")
+        self.cache.invalidate("board", board_id)
+        if self.sync != None:
+            self.sync.markStale(board_id)
+        return results
+    #Returns the parsed schema of the board json, reusing the last one parsed for the board while its updated_at
+    #is the same
+    def __board_schema(self, board):
+        with self.board_schemas_lock:
+            schema = self.board_schemas.get(board["id"])
+        if schema != None and schema.updated_at == board["updated_at"]:
+            metrics.increment("monday_board_schemas_total", {"result": "hit"})
+            return schema
+        schema = MondayBoardSchema(board)
+        metrics.increment("monday_board_schemas_total", {"result": "parsed"})
+        with self.board_schemas_lock:
+            self.board_schemas[board["id"]] = schema
+        return schema
+    def __cache_board(self, board):
+        self.cache.set("board", board["id"], board)
+        self.cache.set("groups", board["id"], board["groups"])
+        self.cache.set("columns", board["id"], board["columns"])
+    #Each call is timed per endpoint, including its retries and decoding the response
     def __perform_request__(self, extension, parameters, request_type):
         parameters["api_key"] = self.key
         parameters["user_id"] = self.user_id
-        if request_type == "get":
-            response = requests.get(url = self.base_url + extension, params = parameters)
+        with metrics.span("monday_api_call_seconds", {"method": request_type, "endpoint": endpointLabel(extension)}):
+            response = self.transport.request(request_type, self.base_url + extension, parameters)
             return self.__handle_monday_response(response)
-        elif request_type == "post":
-            response = requests.post(url = self.base_url + extension, params = parameters)
-            return self.__handle_monday_response(response)
-        elif request_type == "put":
-            response = requests.put(url = self.base_url + extension, params = parameters)
-            return self.__handle_monday_response(response)
-        elif request_type == "delete":
-            response = requests.delete(url = self.base_url + extension, params = parameters)
-            return self.__handle_monday_response(response)
-        else:
-            raise Exception("Invalid request type")
     def __handle_monday_response(self, response):
         if response.status_code == 200:
-            return response.json()
+            return monday_json.loads(response.content)
         if response.status_code == 201:
-            return response.json()
+            return monday_json.loads(response.content)
         elif response.status_code == 401:
             raise Exception("invalid API key")
         elif response.status_code == 402:
             raise Exception("Monday payment required")
         elif response.status_code == 404:
             raise Exception("Resource not found")
+        elif response.status_code == 429:
+            raise Exception("Monday rate limit exceeded")
         else:
-            raise Exception("Unexpected status code {}".format(response.status_code))
\ No newline at end of file
+            raise Exception("Unexpected status code {}".format(response.status_code))
+
+#Collects pulse moves and sends them in bulk. Moves are coalesced per board and target group (the last move
+#queued for a pulse wins), split into chunks of chunk_size ids and the chunks are sent concurrently.
+#Chunks that fail stay queued, so calling flush again only retries those. chunk_size defaults to the api's
+#move_chunk_size so each chunk is a single request. Every chunk gets an id made of its board, group and position,
+#which is the same whenever the same moves are queued. When a completed set is given, chunks whose id is in it
+#are not sent again and the ids of chunks that go through are added to it
+class MondayMoveQueue:
+    def __init__(self, api, chunk_size=None, concurrency=4, completed=None):
+        self.api = api
+        self.chunk_size = chunk_size if chunk_size != None else api.move_chunk_size
+        self.concurrency = concurrency
+        self.completed = completed
+        self.moves = {}
+        self.lock = threading.Lock()
+    #Queues moving the MondayPulse to the MondayBoardGroup
+    def enqueue(self, pulse, group):
+        self.enqueueIds(pulse.board_id, pulse.id, group.id)
+    def enqueueIds(self, board_id, pulse_id, group_id):
+        with self.lock:
+            self.moves[(board_id, pulse_id)] = group_id
+    def pending(self):
+        return len(self.moves)
+    #Sends every queued move and returns a result for each chunk with its id, board_id, group_id, pulse_ids, error,
+    #the seconds sending it took and whether it was skipped as already completed. on_chunk is called with each
+    #result as it comes in
+    def flush(self, on_chunk=None):
+        with self.lock:
+            moves = self.moves
+            self.moves = {}
+        targets = {}
+        for (board_id, pulse_id), group_id in moves.items():
+            targets.setdefault((board_id, group_id), []).append(pulse_id)
+        chunks = []
+        for (board_id, group_id), pulse_ids in sorted(targets.items()):
+            pulse_ids.sort()
+            for start in range(0, len(pulse_ids), self.chunk_size):
+                chunk_id = "{}:{}:{}".format(board_id, group_id, start)
+                chunks.append({"id": chunk_id, "board_id": board_id, "group_id": group_id, "pulse_ids": pulse_ids[start:start + self.chunk_size], "error": None, "seconds": 0.0, "skipped": self.completed != None and chunk_id in self.completed})
+        results = filter(lambda x: x["skipped"], chunks)
+        for result in results:
+            if on_chunk != None:
+                on_chunk(result)
+        pending = filter(lambda x: not x["skipped"], chunks)
+        if len(pending) > 0:
+            pool = ThreadPool(max(1, min(self.concurrency, len(pending))))
+            try:
+                for result in pool.imap_unordered(self.__send_chunk, pending):
+                    if result["error"] == None and self.completed != None:
+                        self.completed.add(result["id"])
+                    if on_chunk != None:
+                        on_chunk(result)
+                    results.append(result)
+            finally:
+                pool.terminate()
+        for result in filter(lambda x: x["error"] != None, results):
+            for pulse_id in result["pulse_ids"]:
+                with self.lock:
+                    self.moves.setdefault((result["board_id"], pulse_id), result["group_id"])
+        return results
+    def __send_chunk(self, chunk):
+        start = time.time()
+        try:
+            self.api.movePulsesToGroup(chunk["board_id"], chunk["pulse_ids"], chunk["group_id"])
+        except Exception as e:
+            chunk["error"] = str(e)
+        chunk["seconds"] = time.time() - start
+        return chunk
@@ -1,65 +1,260 @@
 import monday
-from itertools import ifilter
+import monday_rules
+from monday_transport import MondayTransport
+from monday_sync import MondayPulseStore
+from monday_store import MondayHistoryStore
+from monday_metrics import metrics, MondaySamplingProfiler
+from multiprocessing.pool import ThreadPool
 import datetime
+import json
+import os
 import sys
+import time
 
-class MondayAutomator:
-    def __init__(self):
-        self.api = self.__setup_monday_api__()
+#The boards reset_week works on, and the only ones snapshot records
+RESET_WEEK_BOARDS = ["Operations Tasks", "Website Tasks", "Marketing Team Tasks"]
 
-    def __get_monday_credentials__(self):
-        api_key_file = open("api_key.txt", "r")
-        api_key = api_key_file.readline().rstrip("\n")
-        api_key_file.close()
-        user_id_file = open("user_id.txt", "r")
-        user_id = user_id_file.readline().rstrip("\n")
-        user_id_file.close()
-        return api_key, user_id
+class MondayAutomator:
+    #Rules are read from rules_path when it exists, otherwise the default reset_week rules are used.
+    #Without an api one is set up from the credentials in api_key.txt and user_id.txt.
+    #When a history store is given reset_week records the pulses it sees as a snapshot
+    def __init__(self, rules_path="automation_rules.json", api=None, history=None):
+        self.api = api if api != None else self.__setup_monday_api__()
+        self.history = history
+        self.rules = monday_rules.loadRules(rules_path) if os.path.exists(rules_path) else monday_rules.DEFAULT_RULES
 
     def __setup_monday_api__(self):
-        api_key, user_id = self.__get_monday_credentials__()
-        return monday.MondayAPI(api_key, user_id)
+        api_key, user_id = monday.loadMondayCredentials()
+        #Sized for reset_week running three boards at once with four page fetches each
+        transport = MondayTransport(pool_size=12)
+        #The pulse store keeps the boards' pulses on disk between cron runs. With it the board list is always fetched
+        #fresh, so board metadata is only cached in memory and the parsed board schemas are reused from there
+        pulse_store = MondayPulseStore("monday_pulses.db")
+        return monday.MondayAPI(api_key, user_id, page_concurrency=4, transport=transport, pulse_store=pulse_store)
 
-    def reset_week(self):
-        relevant_boards = ["Operations Tasks", "Website Tasks", "Marketing Team Tasks"]
-        monday_boards = filter(lambda x: x.name in relevant_boards, self.api.getBoards())
-        for board in monday_boards:
-            this_week = next(ifilter(lambda x: x.title == "This Week", board.groups), None)
-            complete = next(ifilter(lambda x: x.title == "Completed", board.groups), None)
-            future = next(ifilter(lambda x: x.title == "Future", board.groups), None)
-            pulses = board.getPulses()
-            this_week_pulses = filter(lambda x: x.group_id == this_week.id, pulses)
-            future_pulses = filter(lambda x: x.group_id == future.id, pulses)
-            this_week_finished = filter(lambda x: self.__is_pulse_done__(board.columns, x), this_week_pulses)
-            future_coming_up = filter(lambda x: self.__is_pulse_coming_up(x), future_pulses)
-            if len(this_week_finished) > 0:
-                board.movePulsesToGroup(this_week_finished, "Completed")
-            if len(future_coming_up) > 0:
-                board.movePulsesToGroup(future_coming_up, "This Week")
-    def __is_pulse_done__(self, columns, pulse):
-        if pulse.column_values["Status"].get("value", None) != None:
-            value = pulse.column_values["Status"]
-            status = columns["Status"](value)
-            return status.value == "Done"
-        else:
-            return False
-    def __is_pulse_coming_up(self, pulse):
-        if pulse.column_values["Timeline"]["value"] != None:
-            start_date = datetime.datetime.strptime(pulse.column_values["Timeline"]["value"]["from"], '%Y-%m-%d')
-            cutoff = datetime.datetime.now() + datetime.timedelta(days=7)
-            return start_date < cutoff
-        else:
-            return False
+    #Applies the automation rules to each of the relevant boards, by default finished pulses move out of This Week
+    #and upcoming pulses move out of Future. It runs as plan_week followed by apply_plan, see those for details.
+    #Returns a report for each board with its pulse count, move counts and timing, plan_seconds for fetching and
+    #classifying the board, apply_seconds for sending its moves and seconds for both. A failure while planning is
+    #reported as plan_error and one while moving as move_error. With dry_run nothing is moved and the plan is
+    #returned, each report listing the moves that would have been made.
+    #With a checkpoint_path the plan and its progress are saved there, and a run that finds an unfinished plan from
+    #the last checkpoint_max_age seconds resumes it without fetching the boards again
+    def reset_week(self, workers=1, dry_run=False, checkpoint_path=None, checkpoint_max_age=86400):
+        with metrics.span("monday_automation_seconds", {"automation": "reset_week"}):
+            checkpoint = self.__load_checkpoint__(checkpoint_path, checkpoint_max_age) if not dry_run else None
+            if checkpoint == None:
+                checkpoint = {"created_at": time.time(), "reports": self.plan_week(workers, record_history=not dry_run), "completed_chunks": []}
+                resumed = False
+            else:
+                resumed = True
+            if dry_run:
+                return checkpoint["reports"]
+            reports = self.apply_plan(checkpoint, checkpoint_path)
+            for report in reports:
+                report["resumed"] = resumed
+            return reports
+    #Records the reset_week boards as a history snapshot and drops the snapshots older than retention_days,
+    #returns the id of the new snapshot
+    def snapshot(self, retention_days=90):
+        snapshot_id = self.history.recordBoards(self.api, RESET_WEEK_BOARDS)
+        if retention_days != None:
+            self.history.pruneSnapshots(time.time() - retention_days * 86400)
+        return snapshot_id
+    #Plan phase, fetches the relevant boards on up to workers threads and returns a report for each with the moves
+    #its rules call for as planned_moves. Only pulses that are not already in their target group are planned, so
+    #the plan is the difference between the boards and the state the rules want. A failure on one board does not
+    #stop the others. With record_history the pulses seen are stored as a history snapshot
+    def plan_week(self, workers=1, record_history=True):
+        with metrics.span("monday_automation_step_seconds", {"step": "get_boards"}):
+            monday_boards = filter(lambda x: x.name in RESET_WEEK_BOARDS, self.api.getBoards())
+        now = datetime.datetime.now()
+        snapshot_id = self.history.createSnapshot() if self.history != None and record_history else None
+        plan = lambda board: self.__plan_board_week__(board, now, snapshot_id)
+        if workers <= 1 or len(monday_boards) <= 1:
+            return map(plan, monday_boards)
+        pool = ThreadPool(min(workers, len(monday_boards)))
+        try:
+            return pool.map(plan, monday_boards)
+        finally:
+            pool.terminate()
+    #Apply phase, sends the planned moves of the checkpoint (a dict of created_at, reports and completed_chunks)
+    #through a MondayMoveQueue. Chunks already in completed_chunks are skipped and every chunk that goes through is
+    #added to it and saved to checkpoint_path, which is removed once nothing is left. Each report's moves counts the
+    #moves that have gone through, in this run or an earlier one, and move_error holds the last failure of this run.
+    #Moving a pulse into the group it is already in changes nothing, so repeating a chunk is harmless
+    def apply_plan(self, checkpoint, checkpoint_path=None):
+        reports = checkpoint["reports"]
+        reports_by_board = dict(map(lambda x: (x["board_id"], x), reports))
+        titles = {}
+        moves = monday.MondayMoveQueue(self.api, completed=set(checkpoint["completed_chunks"]))
+        for report in reports:
+            report["moves"] = {}
+            report["failed_moves"] = 0
+            report["move_error"] = None
+            report["apply_seconds"] = 0.0
+            report["seconds"] = report["plan_seconds"]
+            for move in report["planned_moves"]:
+                titles[(report["board_id"], move["to_group_id"])] = move["to"]
+                moves.enqueueIds(report["board_id"], move["pulse_id"], move["to_group_id"])
+        if checkpoint_path != None and moves.pending() > 0:
+            self.__save_checkpoint__(checkpoint, checkpoint_path)
+        def chunk_done(result):
+            report = reports_by_board[result["board_id"]]
+            report["apply_seconds"] += result["seconds"]
+            report["seconds"] = report["plan_seconds"] + report["apply_seconds"]
+            if result["error"] != None:
+                report["failed_moves"] += len(result["pulse_ids"])
+                report["move_error"] = result["error"]
+                return
+            title = titles[(result["board_id"], result["group_id"])]
+            report["moves"][title] = report["moves"].get(title, 0) + len(result["pulse_ids"])
+            if not result["skipped"]:
+                metrics.increment("monday_automation_moves_total", {"automation": "reset_week", "to": title}, len(result["pulse_ids"]))
+                checkpoint["completed_chunks"].append(result["id"])
+                if checkpoint_path != None:
+                    self.__save_checkpoint__(checkpoint, checkpoint_path)
+        with metrics.span("monday_automation_step_seconds", {"step": "apply_moves"}):
+            moves.flush(chunk_done)
+        failed = sum(map(lambda x: x["failed_moves"], reports))
+        if checkpoint_path != None and failed == 0 and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return reports
+    def __plan_board_week__(self, board, now, snapshot_id):
+        report = {"board": board.name, "board_id": board.id, "pulses": 0, "moves": {}, "failed_moves": 0, "skipped_rules": [], "plan_error": None, "move_error": None, "planned_moves": []}
+        start = time.time()
+        try:
+            with metrics.span("monday_automation_step_seconds", {"step": "compile_rules"}):
+                rules = monday_rules.compileRules(self.rules, board, now)
+            report["skipped_rules"] = rules.skipped
+            if len(rules.rules) == 0:
+                raise Exception("No rules apply to this board")
+            #Pulses are classified in one pass as the pages stream in, only the moves are kept
+            def classified(pulses):
+                for pulse in pulses:
+                    report["pulses"] += 1
+                    target = rules.classify(pulse)
+                    if target != None and target.id != pulse.group_id:
+                        report["planned_moves"].append({"pulse_id": pulse.id, "pulse": pulse.name, "from_group_id": pulse.group_id, "to_group_id": target.id, "to": target.title})
+                    yield pulse
+            #Fetching, classifying and recording overlap, so they are timed as one step
+            with metrics.span("monday_automation_step_seconds", {"step": "classify_board"}):
+                if snapshot_id != None:
+                    self.history.recordPulses(snapshot_id, board, classified(board.iterPulses()))
+                else:
+                    for pulse in classified(board.iterPulses()):
+                        pass
+        except Exception as e:
+            report["plan_error"] = str(e)
+            metrics.increment("monday_automation_errors_total", {"automation": "reset_week"})
+        report["plan_seconds"] = time.time() - start
+        report["seconds"] = report["plan_seconds"]
+        metrics.increment("monday_automation_pulses_total", {"automation": "reset_week"}, report["pulses"])
+        metrics.increment("monday_automation_planned_moves_total", {"automation": "reset_week"}, len(report["planned_moves"]))
+        return report
+    def __load_checkpoint__(self, checkpoint_path, checkpoint_max_age):
+        if checkpoint_path == None or not os.path.exists(checkpoint_path):
+            return None
+        checkpoint_file = open(checkpoint_path, "r")
+        checkpoint = json.load(checkpoint_file)
+        checkpoint_file.close()
+        if time.time() - checkpoint["created_at"] > checkpoint_max_age:
+            return None
+        return checkpoint
+    #Writes to a temporary file first so an interrupted write never leaves a broken checkpoint behind
+    def __save_checkpoint__(self, checkpoint, checkpoint_path):
+        checkpoint_file = open(checkpoint_path + ".tmp", "w")
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.close()
+        os.rename(checkpoint_path + ".tmp", checkpoint_path)
+
+#Jobs the daemon runs and their cron schedules, overridden by automation_schedule.json when it exists.
+#snapshot keeps retention_days of history
+DEFAULT_SCHEDULE = {
+    "reset_week": {"cron": "0 6 * * 1", "timeout": 1800, "jitter": 60},
+    "snapshot": {"cron": "0 * * * *", "timeout": 600, "jitter": 30, "retention_days": 90}
+}
 
 class AutomationHandler:
-    def __init__(self):
-        self.automator = MondayAutomator()
+    def __init__(self, checkpoint_path="reset_week_checkpoint.json"):
+        self.automator = MondayAutomator(history=MondayHistoryStore("monday_history.db"))
+        self.checkpoint_path = checkpoint_path
     def handleCommand(self, arguments):
+        #reset_week [workers] [--dry-run] [--fresh], resumes an interrupted run unless --fresh is given
         if arguments[1] == "reset_week":
-            self.automator.reset_week()
+            dry_run = "--dry-run" in arguments
+            if "--fresh" in arguments and os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+            arguments = filter(lambda x: x not in ("--dry-run", "--fresh"), arguments)
+            workers = int(arguments[2]) if len(arguments) > 2 else 3
+            print(json.dumps(self.automator.reset_week(workers, dry_run, self.checkpoint_path), indent=2))
+        #snapshot records the reset_week boards in the history store and drops snapshots older than 90 days
+        elif arguments[1] == "snapshot":
+            print(json.dumps({"snapshot_id": self.automator.snapshot()}))
+        #moved_since YYYY-MM-DD lists the pulses whose group changed since the last snapshot before that day
+        elif arguments[1] == "moved_since":
+            since = time.mktime(datetime.datetime.strptime(arguments[2], '%Y-%m-%d').timetuple())
+            print(json.dumps(self.automator.history.movedSince(since), indent=2))
+        #starting_before YYYY-MM-DD lists the pulses of the newest snapshot whose timeline starts before that day
+        elif arguments[1] == "starting_before":
+            print(json.dumps(self.automator.history.pulsesStartingBefore(arguments[2]), indent=2))
+        #daemon [port] keeps one warm automator and runs the scheduled jobs until interrupted,
+        #jobs can also be run through the local control server on the port
+        elif arguments[1] == "daemon":
+            self.runDaemon(int(arguments[2]) if len(arguments) > 2 else 8765)
+        #weekly_stats [YYYY-MM-DD] [--json path], the week defaults to the current one
+        elif arguments[1] == "weekly_stats":
+            import weekly_stats
+            export_path = arguments[arguments.index("--json") + 1] if "--json" in arguments else None
+            arguments = filter(lambda x: x not in ("--json", export_path), arguments)
+            start = datetime.datetime.strptime(arguments[2], '%Y-%m-%d').date() if len(arguments) > 2 else weekly_stats.weekStart()
+            stats = weekly_stats.weeklyStats(weekly_stats.pulseFrame(self.automator.api), start)
+            if export_path != None:
+                weekly_stats.exportWeeklyStats(stats, export_path)
+            print(json.dumps(stats, indent=2))
+
+    def runDaemon(self, port, schedule_path="automation_schedule.json"):
+        from monday_scheduler import MondayScheduler, MondayJob, MondayControlServer
+        if os.path.exists(schedule_path):
+            schedule_file = open(schedule_path, "r")
+            schedule = json.load(schedule_file)
+            schedule_file.close()
+        else:
+            schedule = DEFAULT_SCHEDULE
+        jobs = {
+            "reset_week": lambda: self.automator.reset_week(3, checkpoint_path=self.checkpoint_path),
+            "snapshot": lambda: self.automator.snapshot(schedule.get("snapshot", {}).get("retention_days", 90))
+        }
+        scheduler = MondayScheduler()
+        for name, settings in schedule.items():
+            if name not in jobs:
+                raise Exception("Unknown job {}".format(name))
+            scheduler.register(MondayJob(name, settings.get("cron"), jobs[name], settings.get("timeout"), settings.get("jitter", 0)))
+        scheduler.start()
+        control = MondayControlServer(scheduler, port)
+        try:
+            control.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.stop()
+            control.server_close()
 
-if (len(sys.argv) < 2):
-    raise Exception("Invalid parameters passed")
+#Any command takes --profile to sample where its time goes. When a command finishes a json summary of the
+#requests, pages, model building and automation steps it took is printed to stderr
+if __name__ == "__main__":
+    if (len(sys.argv) < 2):
+        raise Exception("Invalid parameters passed")
 
-handler = AutomationHandler()
-handler.handleCommand(sys.argv)
\ No newline at end of file
+    profiler = MondaySamplingProfiler() if "--profile" in sys.argv else None
+    if profiler != None:
+        profiler.start()
+    try:
+        handler = AutomationHandler()
+        handler.handleCommand(filter(lambda x: x != "--profile", sys.argv))
+    finally:
+        summary = {"metrics": metrics.summary()}
+        if profiler != None:
+            profiler.stop()
+            summary["profile"] = profiler.summary()
+        sys.stderr.write(json.dumps(summary, indent=2) + "\n")
\ No newline at end of file
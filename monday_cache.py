@@ -0,0 +1,81 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import monday_json
+
+#Stores cache entries in a sqlite file so they survive between runs of the automations
+class MondaySqliteCacheBackend:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS cache (kind TEXT, key TEXT, expires_at REAL, value TEXT, PRIMARY KEY (kind, key))")
+        self.connection.commit()
+    #Returns the (expires_at, value) pair for the entry or None if it is missing
+    def get(self, kind, key):
+        with self.lock:
+            row = self.connection.execute("SELECT expires_at, value FROM cache WHERE kind = ? AND key = ?", (kind, str(key))).fetchone()
+        if row == None:
+            return None
+        return row[0], monday_json.loads(row[1])
+    def set(self, kind, key, expires_at, value):
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)", (kind, str(key), expires_at, json.dumps(value)))
+            self.connection.commit()
+    def delete(self, kind, key=None):
+        with self.lock:
+            if key == None:
+                self.connection.execute("DELETE FROM cache WHERE kind = ?", (kind,))
+            else:
+                self.connection.execute("DELETE FROM cache WHERE kind = ? AND key = ?", (kind, str(key)))
+            self.connection.commit()
+
+#Read through cache for raw monday json. Every kind of entity has its own ttl in seconds, entries are kept in
+#memory with lru eviction and are written through to the backend when there is one
+class MondayCache:
+    DEFAULT_TTLS = {"boards": 300, "board": 300, "groups": 3600, "columns": 86400}
+    def __init__(self, max_entries=256, ttls=None, backend=None):
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls != None:
+            self.ttls.update(ttls)
+        self.backend = backend
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    #Returns the cached value or None if it is missing or expired
+    def get(self, kind, key):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.pop((kind, key), None)
+            if entry != None and entry[0] > now:
+                self.entries[(kind, key)] = entry
+                return entry[1]
+        if self.backend == None:
+            return None
+        entry = self.backend.get(kind, key)
+        if entry == None or entry[0] <= now:
+            return None
+        self.__remember((kind, key), entry)
+        return entry[1]
+    def set(self, kind, key, value):
+        entry = (time.time() + self.ttls.get(kind, 300), value)
+        self.__remember((kind, key), entry)
+        if self.backend != None:
+            self.backend.set(kind, key, entry[0], value)
+    #Drops a single entry or, when no key is given, every entry of that kind
+    def invalidate(self, kind, key=None):
+        with self.lock:
+            if key == None:
+                for cache_key in filter(lambda x: x[0] == kind, self.entries.keys()):
+                    del self.entries[cache_key]
+            else:
+                self.entries.pop((kind, key), None)
+        if self.backend != None:
+            self.backend.delete(kind, key)
+    def __remember(self, cache_key, entry):
+        with self.lock:
+            self.entries.pop(cache_key, None)
+            self.entries[cache_key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
@@ -0,0 +1,170 @@
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+import monday
+import monday_rules
+from monday_metrics import metrics
+
+#Monday webhook event types that change a pulse's group or column values, anything else about a pulse
+#(new, renamed, deleted, ...) marks its board stale so the next sync fetches it
+GROUP_EVENTS = ("move_pulse_into_group", "move_item_to_group")
+COLUMN_EVENTS = ("update_column_value", "change_column_value", "change_status_column_value", "change_specific_column_value")
+
+#Converts a column value from a webhook into the shape the v1 pulse endpoints return it in
+def webhookColumnValue(column_type, value):
+    if value == None:
+        return None
+    if column_type == "color" and isinstance(value, dict) and "label" in value:
+        return {"index": value["label"].get("index")} if isinstance(value["label"], dict) else value
+    return value
+
+#Reads a monday webhook body into (board_id, pulse_id, change) or None when it is not about a pulse.
+#change holds the new group_id and the new column values by column id, stale is set when it can not be applied locally
+def parseMondayEvent(payload):
+    event = payload.get("event") if isinstance(payload, dict) else None
+    if not isinstance(event, dict) or event.get("boardId") == None or event.get("pulseId") == None:
+        return None
+    change = {"group_id": None, "columns": {}, "stale": False}
+    if event.get("type") in GROUP_EVENTS:
+        change["group_id"] = event.get("destGroupId", event.get("groupId"))
+    elif event.get("type") in COLUMN_EVENTS and event.get("columnId") != None:
+        change["columns"][event["columnId"]] = webhookColumnValue(event.get("columnType"), event.get("value"))
+    else:
+        change["stale"] = True
+    return int(event["boardId"]), int(event["pulseId"]), change
+
+def decode_base64url(value):
+    return base64.urlsafe_b64decode(str(value) + "=" * (-len(value) % 4))
+
+#Checks the Authorization header monday signs its requests with, a HS256 json web token signed with the app's
+#signing secret. A token that has expired is refused
+def verifyMondaySignature(authorization, secret):
+    token = authorization.split(" ", 1)[1] if authorization.startswith("Bearer ") else authorization
+    parts = token.split(".")
+    if len(parts) != 3:
+        return False
+    try:
+        header = json.loads(decode_base64url(parts[0]))
+        claims = json.loads(decode_base64url(parts[1]))
+        signature = decode_base64url(parts[2])
+    except (TypeError, ValueError):
+        return False
+    if not isinstance(header, dict) or header.get("alg") != "HS256" or not isinstance(claims, dict):
+        return False
+    expected = hmac.new(str(secret), "{}.{}".format(parts[0], parts[1]), hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature):
+        return False
+    return claims.get("exp") == None or claims["exp"] > time.time()
+
+def mergeChanges(earlier, later):
+    columns = dict(earlier["columns"])
+    columns.update(later["columns"])
+    return {"group_id": later["group_id"] if later["group_id"] != None else earlier["group_id"], "columns": columns, "stale": earlier["stale"] or later["stale"]}
+
+#Bounded queue of pulse changes. Changes to the same pulse are merged into one entry, which is handed to the
+#handler once the pulse has been quiet for debounce seconds (or max_delay seconds after its first change).
+#At most max_pending pulses wait at once, put returns False for a new pulse when the queue is full
+class MondayEventQueue:
+    def __init__(self, handler, debounce=2, max_delay=30, max_pending=10000, poll_interval=0.5):
+        self.handler = handler
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+    def put(self, board_id, pulse_id, change):
+        now = time.time()
+        key = (board_id, pulse_id)
+        with self.lock:
+            entry = self.pending.get(key)
+            if entry == None:
+                if len(self.pending) >= self.max_pending:
+                    metrics.increment("monday_webhook_events_total", {"result": "rejected"})
+                    return False
+                self.pending[key] = {"change": change, "first_seen": now, "last_seen": now}
+            else:
+                entry["change"] = mergeChanges(entry["change"], change)
+                entry["last_seen"] = now
+        metrics.increment("monday_webhook_events_total", {"result": "queued"})
+        return True
+    def size(self):
+        return len(self.pending)
+    #Hands every settled entry (or every entry when force is set) to the handler as a list of
+    #(board_id, pulse_id, change) and returns how many there were
+    def drain(self, force=False):
+        now = time.time()
+        with self.lock:
+            ready = filter(lambda x: force or now - x[1]["last_seen"] >= self.debounce or now - x[1]["first_seen"] >= self.max_delay, self.pending.items())
+            for key, _ in ready:
+                del self.pending[key]
+        if len(ready) > 0:
+            metrics.increment("monday_webhook_batches_total")
+            metrics.observe("monday_webhook_batch_size", len(ready))
+            self.handler(map(lambda x: (x[0][0], x[0][1], x[1]["change"]), ready))
+        return len(ready)
+    def start(self):
+        self.thread = threading.Thread(target=self.__run)
+        self.thread.daemon = True
+        self.thread.start()
+    def stop(self):
+        self.stopped.set()
+    def __run(self):
+        while not self.stopped.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logging.exception("Handling monday events failed")
+            self.stopped.wait(self.poll_interval)
+
+#Applies batches of pulse changes to the api's pulse store and the snapshot, then runs the automation rules
+#against just the changed pulses and sends the resulting moves. Needs an api with a pulse store
+class MondayEventProcessor:
+    def __init__(self, api, rules, snapshot=None, chunk_size=None, concurrency=4):
+        self.api = api
+        self.rules = rules
+        self.snapshot = snapshot
+        self.moves = monday.MondayMoveQueue(api, chunk_size=chunk_size, concurrency=concurrency)
+    #Returns the move results like MondayMoveQueue.flush
+    def __call__(self, events):
+        changes = {}
+        for board_id, pulse_id, change in events:
+            if change["stale"]:
+                self.api.sync.markStale(board_id)
+            else:
+                changes.setdefault(board_id, {})[pulse_id] = change
+        now = datetime.datetime.now()
+        for board_id, board_changes in changes.items():
+            updated = self.api.sync.applyPulseChanges(board_id, board_changes)
+            if len(updated) < len(board_changes):
+                self.api.sync.markStale(board_id)
+            if len(updated) == 0:
+                continue
+            board = self.__board(board_id)
+            pulses = monday.buildMondayPulses(updated.values(), board.columns)
+            rules = monday_rules.compileRules(self.rules, board, now)
+            for pulse in pulses:
+                target = rules.classify(pulse)
+                if target != None and target.id != pulse.group_id:
+                    self.moves.enqueue(pulse, target)
+            self.__update_snapshot(board, updated)
+        results = self.moves.flush()
+        for result in filter(lambda x: x["error"] == None, results):
+            moved = self.api.sync.applyPulseChanges(result["board_id"], dict(map(lambda x: (x, {"group_id": result["group_id"]}), result["pulse_ids"])))
+            self.__update_snapshot(self.__board(result["board_id"]), moved)
+        for result in filter(lambda x: x["error"] != None, results):
+            logging.error("Moving pulses %s to %s failed: %s", result["pulse_ids"], result["group_id"], result["error"])
+        return results
+    def __board(self, board_id):
+        board = self.snapshot.monday_boards.get(board_id) if self.snapshot != None else None
+        return board if board != None else self.api.getBoard(board_id)
+    def __update_snapshot(self, board, raw_pulses):
+        if self.snapshot != None:
+            self.snapshot.updatePulses(board.id, monday.buildMondayPulses(raw_pulses.values(), board.columns))
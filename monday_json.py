@@ -0,0 +1,15 @@
+import os
+
+#Decodes json with the fastest library installed, ujson then simplejson, falling back to the standard library.
+#Setting MONDAY_JSON to json, simplejson or ujson picks one explicitly
+def load_json_backend(preferred=None):
+    names = [preferred] if preferred != None else ["ujson", "simplejson", "json"]
+    for name in names:
+        try:
+            module = __import__(name)
+        except ImportError:
+            continue
+        return name, module.loads
+    raise Exception("No json library named {}".format(preferred))
+
+backend, loads = load_json_backend(os.environ.get("MONDAY_JSON"))
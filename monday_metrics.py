@@ -0,0 +1,152 @@
+import collections
+import re
+import sys
+import threading
+import time
+import traceback
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+#Turns a request url into an endpoint label with the ids replaced, e.g. /v1/boards/{id}/pulses.json
+def endpointLabel(url):
+    path = re.sub(r"^[a-z]+://[^/]+", "", url).split("?", 1)[0]
+    return re.sub(r"/\d+(?=/|\.|$)", "/{id}", path)
+
+class MondayHistogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min == None else min(self.min, value)
+        self.max = value if self.max == None else max(self.max, value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+    def summary(self):
+        return {"count": self.count, "sum": self.sum, "mean": self.sum / self.count if self.count > 0 else None, "min": self.min, "max": self.max}
+
+#Process wide counters, gauges and histograms, each keyed by name and a dict of labels
+class MondayMetrics:
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+    def increment(self, name, labels=None, value=1):
+        key = (name, self.__label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+    def setGauge(self, name, value, labels=None):
+        with self.lock:
+            self.gauges[(name, self.__label_key(labels))] = value
+    def observe(self, name, value, labels=None):
+        key = (name, self.__label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram == None:
+                histogram = self.histograms[key] = MondayHistogram()
+            histogram.observe(value)
+    #Context manager that observes how many seconds its block took
+    def span(self, name, labels=None):
+        return MondaySpan(self, name, labels)
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+    #Plain dict of every metric for printing as json
+    def summary(self):
+        describe = lambda key: key[0] + ("{" + ",".join(map(lambda x: "{}={}".format(*x), key[1])) + "}" if len(key[1]) > 0 else "")
+        with self.lock:
+            return {
+                "counters": dict(map(lambda x: (describe(x[0]), x[1]), self.counters.items())),
+                "gauges": dict(map(lambda x: (describe(x[0]), x[1]), self.gauges.items())),
+                "histograms": dict(map(lambda x: (describe(x[0]), x[1].summary()), self.histograms.items()))
+            }
+    #Every metric in the prometheus text exposition format
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            for kind, values in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted(set(map(lambda x: x[0], values.keys()))):
+                    lines.append("# TYPE {} {}".format(name, kind))
+                    for key in sorted(filter(lambda x: x[0] == name, values.keys())):
+                        lines.append("{}{} {}".format(name, self.__format_labels(key[1]), values[key]))
+            for name in sorted(set(map(lambda x: x[0], self.histograms.keys()))):
+                lines.append("# TYPE {} histogram".format(name))
+                for key in sorted(filter(lambda x: x[0] == name, self.histograms.keys())):
+                    histogram = self.histograms[key]
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append("{}_bucket{} {}".format(name, self.__format_labels(key[1] + (("le", repr(float(bound))),)), cumulative))
+                    lines.append("{}_bucket{} {}".format(name, self.__format_labels(key[1] + (("le", "+Inf"),)), histogram.count))
+                    lines.append("{}_sum{} {}".format(name, self.__format_labels(key[1]), repr(histogram.sum)))
+                    lines.append("{}_count{} {}".format(name, self.__format_labels(key[1]), histogram.count))
+        return "\n".join(lines) + "\n"
+    def __label_key(self, labels):
+        return tuple(sorted(map(lambda x: (x[0], str(x[1])), labels.items()))) if labels != None else ()
+    def __format_labels(self, label_key):
+        if len(label_key) == 0:
+            return ""
+        return "{" + ",".join(map(lambda x: '{}="{}"'.format(x[0], x[1].replace("\\", "\\\\").replace('"', '\\"')), label_key)) + "}"
+
+class MondaySpan:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = None
+    def __enter__(self):
+        self.start = time.time()
+        return self
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.metrics.observe(self.name, time.time() - self.start, self.labels)
+        return False
+
+#Samples the stacks of every other thread every interval seconds. Reports how often each function was on top of a
+#stack (self) and anywhere in it (total), which is enough to find the hot spots of a long automation run
+class MondaySamplingProfiler:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self.self_counts = collections.Counter()
+        self.total_counts = collections.Counter()
+        self.stopped = threading.Event()
+        self.thread = None
+    def start(self):
+        self.thread = threading.Thread(target=self.__run)
+        self.thread.daemon = True
+        self.thread.start()
+    def stop(self):
+        self.stopped.set()
+        if self.thread != None:
+            self.thread.join()
+    #The functions seen most often, as dicts of function, self and total sample counts
+    def top(self, count=20):
+        return map(lambda x: {"function": x[0], "self": x[1], "total": self.total_counts[x[0]]}, self.self_counts.most_common(count))
+    def summary(self, count=20):
+        return {"samples": self.samples, "interval": self.interval, "top": self.top(count)}
+    def __run(self):
+        own_thread = threading.current_thread().ident
+        while not self.stopped.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = map(lambda x: "{}:{}".format(x[0], x[2]), traceback.extract_stack(frame))
+                if len(stack) == 0:
+                    continue
+                self.samples += 1
+                self.self_counts[stack[-1]] += 1
+                for function in set(stack):
+                    self.total_counts[function] += 1
+            self.stopped.wait(self.interval)
+
+metrics = MondayMetrics()
@@ -0,0 +1,114 @@
+import datetime
+import json
+import re
+
+#The rules reset_week has always run. Each rule moves pulses in group whose column matches to move_to,
+#a rule without a group applies to pulses in every group. Values on date columns can be relative to the
+#time the rules are compiled, e.g. "now+7d"
+DEFAULT_RULES = [
+    {"name": "finished", "group": "This Week", "column": "Status", "op": "==", "value": "Done", "move_to": "Completed"},
+    {"name": "coming_up", "group": "Future", "column": "Timeline", "field": "from", "op": "<", "value": "now+7d", "move_to": "This Week"}
+]
+
+OPERATORS = {
+    "==": lambda x, y: x == y,
+    "!=": lambda x, y: x != y,
+    "<": lambda x, y: x < y,
+    "<=": lambda x, y: x <= y,
+    ">": lambda x, y: x > y,
+    ">=": lambda x, y: x >= y,
+    "in": lambda x, y: x in y
+}
+
+#Loads a list of rules from a json file, see DEFAULT_RULES for the format
+def loadRules(path):
+    rules_file = open(path, "r")
+    rules = json.load(rules_file)
+    rules_file.close()
+    for rule in rules:
+        if rule.get("op", "==") not in OPERATORS:
+            raise Exception("Unknown operator {} in rule {}".format(rule.get("op"), rule.get("name")))
+    return rules
+
+parsed_dates = {}
+
+#Parses monday's YYYY-MM-DD dates, every distinct date string is only parsed once
+def parseMondayDate(value):
+    parsed = parsed_dates.get(value)
+    if parsed == None:
+        parsed = datetime.datetime.strptime(value, '%Y-%m-%d')
+        parsed_dates[value] = parsed
+    return parsed
+
+def resolveRelativeDate(value, now):
+    match = re.match(r"^now(?:([+-])(\d+)d)?$", value)
+    if match == None:
+        return parseMondayDate(value)
+    if match.group(1) == None:
+        return now
+    days = int(match.group(2)) if match.group(1) == "+" else -int(match.group(2))
+    return now + datetime.timedelta(days=days)
+
+#The rules compiled against one board. Group titles, color labels and relative dates are all resolved up front
+#so classifying a pulse is a group id check and a single predicate per rule
+class MondayCompiledRules:
+    def __init__(self, rules, board, now):
+        self.board = board
+        self.rules = []
+        self.skipped = []
+        for rule in rules:
+            reason = self.__compile(rule, now)
+            if reason != None:
+                self.skipped.append({"rule": rule.get("name"), "reason": reason})
+    #Returns the group the pulse should be moved to or None when no rule matches
+    def classify(self, pulse):
+        for group_id, predicate, target in self.rules:
+            if (group_id == None or pulse.group_id == group_id) and predicate(pulse):
+                return target
+        return None
+    def __compile(self, rule, now):
+        group = None
+        if rule.get("group") != None:
+            group = self.board.groupNamed(rule["group"])
+            if group == None:
+                return "No group named {}".format(rule["group"])
+        target = self.board.groupNamed(rule["move_to"])
+        if target == None:
+            return "No group named {}".format(rule["move_to"])
+        column = self.board.column_definitions.get(rule["column"])
+        if column == None:
+            return "No column named {}".format(rule["column"])
+        predicate = self.__compile_predicate(rule, column, now)
+        self.rules.append((group.id if group != None else None, predicate, target))
+        return None
+    def __compile_predicate(self, rule, column, now):
+        title = rule["column"]
+        op = rule.get("op", "==")
+        value = rule["value"]
+        if column["type"] == "color" and op in ("==", "!=", "in"):
+            labels = value if op == "in" else [value]
+            indices = set()
+            for index, label in column.get("labels", {}).items():
+                if label in labels:
+                    indices.add(index)
+                    indices.add(int(index))
+            matches = lambda x: x != None and x.get("index") in indices
+            if op == "!=":
+                return lambda pulse: not matches(pulse.column_values[title].get("value"))
+            return lambda pulse: matches(pulse.column_values[title].get("value"))
+        compare = OPERATORS[op]
+        if column["type"] in ("timerange", "date"):
+            field = rule.get("field", "from" if column["type"] == "timerange" else "date")
+            cutoff = resolveRelativeDate(value, now)
+            def date_predicate(pulse):
+                raw = pulse.column_values[title].get("value")
+                if raw == None:
+                    return False
+                date = raw.get(field) if isinstance(raw, dict) else raw
+                return date != None and compare(parseMondayDate(date), cutoff)
+            return date_predicate
+        return lambda pulse: compare(pulse.column_values[title].get("value"), value)
+
+#Compiles the rules for the board, now is evaluated once by the caller and shared by every rule
+def compileRules(rules, board, now=None):
+    return MondayCompiledRules(rules, board, now if now != None else datetime.datetime.now())
@@ -0,0 +1,195 @@
+import BaseHTTPServer
+import datetime
+import json
+import logging
+import random
+import re
+import threading
+import time
+import traceback
+from multiprocessing.pool import ThreadPool
+
+#Five field cron expression: minute hour day-of-month month day-of-week (0 and 7 are Sunday).
+#Each field takes *, a number, a range a-b, a step */n or a-b/n, or a comma separated list of those.
+#Like standard cron, when both day-of-month and day-of-week are restricted (neither starts with *) a day matches
+#if either of them does, so "0 6 1 * 1" runs on the 1st of the month and on every Monday
+class MondayCronSchedule:
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise Exception("Invalid cron expression {}".format(expression))
+        self.expression = expression
+        self.fields = map(lambda x: self.__parse_field(x[0], x[1][0], x[1][1]), zip(fields, self.FIELD_RANGES))
+        if 7 in self.fields[4]:
+            self.fields[4] = (self.fields[4] - set([7])) | set([0])
+        self.either_day = not fields[2].startswith("*") and not fields[4].startswith("*")
+    def matches(self, moment):
+        minutes, hours, days, months, weekdays = self.fields
+        if self.either_day:
+            day_matches = moment.day in days or (moment.isoweekday() % 7) in weekdays
+        else:
+            day_matches = moment.day in days and (moment.isoweekday() % 7) in weekdays
+        return moment.minute in minutes and moment.hour in hours and day_matches and moment.month in months
+    #First whole minute after the given moment that matches, looks at most a year ahead
+    def nextRun(self, after):
+        moment = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        for _ in range(366 * 24 * 60):
+            if self.matches(moment):
+                return moment
+            moment += datetime.timedelta(minutes=1)
+        return None
+    def __parse_field(self, field, low, high):
+        values = set()
+        for part in field.split(","):
+            match = re.match(r"^(\*|\d+(?:-\d+)?)(?:/(\d+))?$", part)
+            if match == None:
+                raise Exception("Invalid cron field {}".format(field))
+            if match.group(1) == "*":
+                start, end = low, high
+            elif "-" in match.group(1):
+                start, end = map(int, match.group(1).split("-"))
+            else:
+                start = end = int(match.group(1))
+            if start < low or end > high:
+                raise Exception("Cron field {} is out of range".format(field))
+            values.update(range(start, end + 1, int(match.group(2) or 1)))
+        return values
+
+#A registered automation. jitter delays each run by up to that many seconds, timeout is how many seconds a run may
+#take before it is reported as timed out. A thread cannot be killed, so a timed out run keeps blocking new runs
+class MondayJob:
+    def __init__(self, name, schedule, func, timeout=None, jitter=0):
+        self.name = name
+        self.schedule = MondayCronSchedule(schedule) if schedule != None else None
+        self.func = func
+        self.timeout = timeout
+        self.jitter = jitter
+        self.running = False
+        self.started_at = None
+        self.runs = 0
+        self.last_finished_at = None
+        self.last_duration = None
+        self.last_error = None
+        self.last_result = None
+        self.timed_out = False
+    def status(self):
+        return {
+            "schedule": self.schedule.expression if self.schedule != None else None,
+            "running": self.running,
+            "started_at": self.started_at,
+            "runs": self.runs,
+            "last_finished_at": self.last_finished_at,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "last_result": self.last_result,
+            "timed_out": self.timed_out
+        }
+
+#Runs registered jobs on their cron schedules on a pool of worker threads. A job never overlaps with itself,
+#scheduled runs that come up while it is still running are skipped
+class MondayScheduler:
+    def __init__(self, workers=4):
+        self.jobs = {}
+        self.pool = ThreadPool(workers)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+    def register(self, job):
+        self.jobs[job.name] = job
+    #Starts a run of the job now, returns False if it is already running
+    def trigger(self, name, jitter=True):
+        job = self.jobs[name]
+        with self.lock:
+            if job.running:
+                return False
+            job.running = True
+            job.started_at = time.time()
+            job.timed_out = False
+        self.pool.apply_async(self.__run_job, (job, jitter))
+        return True
+    #The status of every job with its next_run, which is worked out after letting go of the lock since finding the
+    #next run of a rare schedule can take a while
+    def status(self):
+        with self.lock:
+            statuses = dict(map(lambda x: (x.name, x.status()), self.jobs.values()))
+        now = datetime.datetime.now()
+        for job in self.jobs.values():
+            next_run = job.schedule.nextRun(now) if job.schedule != None else None
+            statuses[job.name]["next_run"] = next_run.isoformat() if next_run != None else None
+        return statuses
+    def start(self):
+        self.thread = threading.Thread(target=self.__loop)
+        self.thread.daemon = True
+        self.thread.start()
+    def stop(self):
+        self.stopped.set()
+        self.pool.close()
+    def __loop(self):
+        last_minute = None
+        while not self.stopped.is_set():
+            now = datetime.datetime.now().replace(second=0, microsecond=0)
+            if now != last_minute:
+                last_minute = now
+                for job in self.jobs.values():
+                    if job.schedule != None and job.schedule.matches(now) and not self.trigger(job.name):
+                        logging.warning("Skipping %s, the previous run is still going", job.name)
+            self.__check_timeouts()
+            self.stopped.wait(1)
+    def __check_timeouts(self):
+        with self.lock:
+            for job in self.jobs.values():
+                if job.running and not job.timed_out and job.timeout != None and time.time() - job.started_at > job.timeout:
+                    job.timed_out = True
+                    logging.error("%s has been running for more than %s seconds", job.name, job.timeout)
+    def __run_job(self, job, jitter):
+        if jitter and job.jitter > 0:
+            time.sleep(random.uniform(0, job.jitter))
+        start = time.time()
+        result = None
+        error = None
+        try:
+            result = job.func()
+        except Exception:
+            error = traceback.format_exc()
+            logging.error("%s failed\n%s", job.name, error)
+        with self.lock:
+            job.running = False
+            job.runs += 1
+            job.last_finished_at = time.time()
+            job.last_duration = job.last_finished_at - start
+            job.last_error = error
+            job.last_result = result
+            job.timed_out = job.timeout != None and job.last_duration > job.timeout
+
+class MondayControlRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") == "/jobs":
+            return self.__respond(200, self.server.scheduler.status())
+        self.__respond(404, {"error": "Not found"})
+    def do_POST(self):
+        match = re.match(r"^/jobs/([^/]+)/run/?$", self.path)
+        if match == None:
+            return self.__respond(404, {"error": "Not found"})
+        name = match.group(1)
+        if name not in self.server.scheduler.jobs:
+            return self.__respond(404, {"error": "No job named {}".format(name)})
+        if not self.server.scheduler.trigger(name, jitter=False):
+            return self.__respond(409, {"error": "{} is already running".format(name)})
+        self.__respond(202, {"started": name})
+    def log_message(self, format, *args):
+        pass
+    def __respond(self, status_code, body):
+        content = json.dumps(body, default=str)
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+#Local http control endpoint: GET /jobs for the status of every job and POST /jobs/<name>/run to run one now.
+#Only listens on localhost
+class MondayControlServer(BaseHTTPServer.HTTPServer):
+    def __init__(self, scheduler, port=8765):
+        BaseHTTPServer.HTTPServer.__init__(self, ("127.0.0.1", port), MondayControlRequestHandler)
+        self.scheduler = scheduler
@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+
+#Flattens a MondayPulse into the plain dict the read api serves
+def serializePulse(pulse, board):
+    status = None
+    if board.column_definitions.get("Status", {}).get("type") == "color" and pulse.column_values["Status"].get("value") != None:
+        status = pulse.column("Status").value
+    timeline = pulse.column_values.get("Timeline", {}).get("value")
+    return {
+        "id": pulse.id,
+        "name": pulse.name,
+        "board_id": board.id,
+        "group_id": pulse.group_id,
+        "status": status,
+        "timeline_from": timeline["from"] if timeline != None else None,
+        "timeline_to": timeline["to"] if timeline != None else None,
+        "created_at": pulse.created_on,
+        "updated_at": pulse.updated_on,
+        "url": pulse.url
+    }
+
+def serializeBoard(board):
+    return {
+        "id": board.id,
+        "name": board.name,
+        "description": board.description,
+        "url": board.url,
+        "updated_at": board.updated_at,
+        "groups": map(lambda x: {"id": x.id, "title": x.title, "color": x.color}, board.groups)
+    }
+
+#In process copy of every board and its pulses, kept up to date by a background thread so readers never call
+#monday themselves. Every refresh swaps in new dicts and bumps version, readers can use version for caching
+class MondayBoardSnapshot:
+    def __init__(self, api, refresh_interval=60):
+        self.api = api
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self.refreshed_at = None
+        self.boards = {}
+        self.pulses = {}
+        self.monday_boards = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+    @property
+    def ready(self):
+        return self.version > 0
+    def refresh(self):
+        boards = {}
+        pulses = {}
+        monday_boards = {}
+        for board in self.api.getBoards():
+            monday_boards[board.id] = board
+            boards[board.id] = serializeBoard(board)
+            pulses[board.id] = sorted(map(lambda x: serializePulse(x, board), board.getPulses()), key=lambda x: x["id"])
+        with self.lock:
+            self.refreshed_at = time.time()
+            self.monday_boards = monday_boards
+            if boards == self.boards and pulses == self.pulses:
+                return
+            self.boards = boards
+            self.pulses = pulses
+            self.version += 1
+    #Swaps in new versions of some of the board's MondayPulses between refreshes, bumping version once
+    def updatePulses(self, board_id, pulses):
+        board = self.monday_boards.get(board_id)
+        if board == None or len(pulses) == 0:
+            return
+        updated = dict(map(lambda x: (x.id, serializePulse(x, board)), pulses))
+        with self.lock:
+            current = self.pulses.get(board_id, [])
+            board_pulses = filter(lambda x: x["id"] not in updated, current) + updated.values()
+            board_pulses.sort(key=lambda x: x["id"])
+            if board_pulses == current:
+                return
+            self.pulses = dict(self.pulses)
+            self.pulses[board_id] = board_pulses
+            self.version += 1
+    def start(self):
+        self.thread = threading.Thread(target=self.__run)
+        self.thread.daemon = True
+        self.thread.start()
+    def stop(self):
+        self.stopped.set()
+    def __run(self):
+        while not self.stopped.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logging.exception("Refreshing the board snapshot failed, serving the previous one")
+            self.stopped.wait(self.refresh_interval)
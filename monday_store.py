@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import threading
+import time
+import monday_json
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS snapshots (id INTEGER PRIMARY KEY AUTOINCREMENT, taken_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS pulses (snapshot_id INTEGER NOT NULL, board_id INTEGER NOT NULL, pulse_id INTEGER NOT NULL, name TEXT, group_id TEXT, status TEXT, timeline_from TEXT, timeline_to TEXT, created_at TEXT, updated_at TEXT, PRIMARY KEY (snapshot_id, pulse_id))",
+    "CREATE TABLE IF NOT EXISTS column_values (snapshot_id INTEGER NOT NULL, pulse_id INTEGER NOT NULL, title TEXT NOT NULL, value TEXT, PRIMARY KEY (snapshot_id, pulse_id, title))",
+    "CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at)",
+    "CREATE INDEX IF NOT EXISTS pulses_board ON pulses (board_id, snapshot_id)",
+    "CREATE INDEX IF NOT EXISTS pulses_group ON pulses (group_id, snapshot_id)",
+    "CREATE INDEX IF NOT EXISTS pulses_status ON pulses (status, snapshot_id)",
+    "CREATE INDEX IF NOT EXISTS pulses_timeline_from ON pulses (timeline_from, snapshot_id)",
+    "CREATE INDEX IF NOT EXISTS pulses_pulse ON pulses (pulse_id, snapshot_id)"
+]
+
+#Local history of board pulses. Each snapshot stores every pulse with its group, status, timeline and raw column
+#values, so questions about past weeks are answered from sqlite instead of downloading the boards again
+class MondayHistoryStore:
+    def __init__(self, path="monday_history.db"):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+    #Starts a new snapshot and returns its id, taken_at defaults to now
+    def createSnapshot(self, taken_at=None):
+        with self.lock:
+            cursor = self.connection.execute("INSERT INTO snapshots (taken_at) VALUES (?)", (taken_at if taken_at != None else time.time(),))
+            self.connection.commit()
+            return cursor.lastrowid
+    #Stores the MondayPulses of the board in the snapshot
+    def recordPulses(self, snapshot_id, board, pulses):
+        pulse_rows = []
+        value_rows = []
+        status_labels = board.column_definitions.get("Status", {}).get("labels", {})
+        for pulse in pulses:
+            status = pulse.column_values["Status"].get("value") if "Status" in pulse.column_values else None
+            timeline = pulse.column_values["Timeline"].get("value") if "Timeline" in pulse.column_values else None
+            pulse_rows.append((snapshot_id, board.id, pulse.id, pulse.name, pulse.group_id,
+                status_labels.get(str(status["index"])) if status != None and status.get("index") != None else None,
+                timeline["from"] if timeline != None else None, timeline["to"] if timeline != None else None,
+                pulse.created_on, pulse.updated_on))
+            for title, value in pulse.column_values.items():
+                value_rows.append((snapshot_id, pulse.id, title, json.dumps(value)))
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO pulses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", pulse_rows)
+            self.connection.executemany("INSERT OR REPLACE INTO column_values VALUES (?, ?, ?, ?)", value_rows)
+            self.connection.commit()
+        return len(pulse_rows)
+    #Takes a snapshot of every board, or only the named ones, and returns its id
+    def recordBoards(self, api, board_names=None):
+        snapshot_id = self.createSnapshot()
+        for board in api.getBoards():
+            if board_names == None or board.name in board_names:
+                self.recordPulses(snapshot_id, board, board.iterPulses())
+        return snapshot_id
+    #Deletes the snapshots taken before the unix time older_than along with their pulses and column values,
+    #returns how many snapshots were deleted
+    def pruneSnapshots(self, older_than):
+        with self.lock:
+            ids = map(lambda x: x[0], self.connection.execute("SELECT id FROM snapshots WHERE taken_at < ?", (older_than,)).fetchall())
+            for snapshot_id in ids:
+                self.connection.execute("DELETE FROM column_values WHERE snapshot_id = ?", (snapshot_id,))
+                self.connection.execute("DELETE FROM pulses WHERE snapshot_id = ?", (snapshot_id,))
+                self.connection.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+            self.connection.commit()
+        return len(ids)
+    #Id of the newest snapshot taken at or before the unix time, or of the newest snapshot overall
+    def latestSnapshot(self, before=None):
+        query = "SELECT id FROM snapshots" + (" WHERE taken_at <= ?" if before != None else "") + " ORDER BY taken_at DESC LIMIT 1"
+        with self.lock:
+            row = self.connection.execute(query, (before,) if before != None else ()).fetchone()
+        return row[0] if row != None else None
+    #Pulses in the snapshot (the newest by default) whose timeline starts before the YYYY-MM-DD date
+    def pulsesStartingBefore(self, date, board_id=None, snapshot_id=None):
+        snapshot_id = snapshot_id if snapshot_id != None else self.latestSnapshot()
+        query = "SELECT * FROM pulses WHERE snapshot_id = ? AND timeline_from < ?"
+        parameters = [snapshot_id, date]
+        if board_id != None:
+            query += " AND board_id = ?"
+            parameters.append(board_id)
+        return self.__select(query + " ORDER BY timeline_from", parameters)
+    #Pulses whose group changed between the last snapshot taken at or before the unix time since (or the first
+    #one after it when there is none) and the newest snapshot, each with the group it moved from
+    def movedSince(self, since, board_id=None):
+        before = self.latestSnapshot(since)
+        if before == None:
+            with self.lock:
+                row = self.connection.execute("SELECT id FROM snapshots WHERE taken_at > ? ORDER BY taken_at LIMIT 1", (since,)).fetchone()
+            before = row[0] if row != None else None
+        after = self.latestSnapshot()
+        if before == None or after == None or before == after:
+            return []
+        query = "SELECT latest.*, earlier.group_id AS from_group_id FROM pulses latest JOIN pulses earlier ON earlier.snapshot_id = ? AND earlier.pulse_id = latest.pulse_id WHERE latest.snapshot_id = ? AND latest.group_id != earlier.group_id"
+        parameters = [before, after]
+        if board_id != None:
+            query += " AND latest.board_id = ?"
+            parameters.append(board_id)
+        return self.__select(query, parameters)
+    #Raw column values of the pulse in the snapshot, keyed by column title
+    def columnValues(self, pulse_id, snapshot_id=None):
+        snapshot_id = snapshot_id if snapshot_id != None else self.latestSnapshot()
+        rows = self.__select("SELECT title, value FROM column_values WHERE snapshot_id = ? AND pulse_id = ?", [snapshot_id, pulse_id])
+        return dict(map(lambda x: (x["title"], monday_json.loads(x["value"])), rows))
+    def __select(self, query, parameters):
+        with self.lock:
+            cursor = self.connection.execute(query, parameters)
+            names = map(lambda x: x[0], cursor.description)
+            return map(lambda x: dict(zip(names, x)), cursor.fetchall())
@@ -0,0 +1,100 @@
+import json
+import sqlite3
+import threading
+import time
+import monday_json
+
+#Keeps the last synced pulses of every board along with the watermarks they were synced at.
+#When a path is given the state is also written to a sqlite file so that it survives between runs
+class MondayPulseStore:
+    def __init__(self, path=None):
+        self.boards = {}
+        self.lock = threading.Lock()
+        self.connection = None
+        if path != None:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS board_pulses (board_id TEXT PRIMARY KEY, state TEXT)")
+            self.connection.commit()
+    #Returns the sync state of the board or None if it has never been synced
+    def get(self, board_id):
+        with self.lock:
+            state = self.boards.get(board_id)
+            if state == None and self.connection != None:
+                row = self.connection.execute("SELECT state FROM board_pulses WHERE board_id = ?", (str(board_id),)).fetchone()
+                if row != None:
+                    state = monday_json.loads(row[0])
+                    self.boards[board_id] = state
+            return state
+    def put(self, board_id, state):
+        with self.lock:
+            self.boards[board_id] = state
+            if self.connection != None:
+                self.connection.execute("INSERT OR REPLACE INTO board_pulses VALUES (?, ?)", (str(board_id), json.dumps(state)))
+                self.connection.commit()
+
+#Serves board pulses from a MondayPulseStore. A board whose updated_at matches the stored watermark is not
+#fetched at all, otherwise only the pulses updated since the newest stored pulse are fetched and merged in.
+#Deleted pulses are only noticed by a full sync, which happens at least every full_sync_interval seconds
+class MondayPulseSync:
+    def __init__(self, api, store, full_sync_interval=86400):
+        self.api = api
+        self.store = store
+        self.full_sync_interval = full_sync_interval
+    #Returns the raw pulses of the given MondayBoard
+    def pulsesForBoard(self, board):
+        state = self.store.get(board.id)
+        if state == None or time.time() - state["full_synced_at"] > self.full_sync_interval:
+            return self.__full_sync(board)
+        if state["watermark"] == board.updated_at:
+            return list(state["pulses"])
+        changed = self.api.getBoardPulsesUpdatedSince(board.id, state["pulse_watermark"])
+        pulses = list(state["pulses"])
+        positions = dict((pulse["pulse"]["id"], index) for index, pulse in enumerate(pulses))
+        for pulse in changed:
+            index = positions.get(pulse["pulse"]["id"])
+            if index == None:
+                positions[pulse["pulse"]["id"]] = len(pulses)
+                pulses.append(pulse)
+            else:
+                pulses[index] = pulse
+        self.store.put(board.id, {"watermark": board.updated_at, "pulse_watermark": self.__pulse_watermark(changed, state["pulse_watermark"]), "full_synced_at": state["full_synced_at"], "pulses": pulses})
+        return list(pulses)
+    #Forces the next sync of the board to fetch the changed pulses even if its updated_at is unchanged
+    def markStale(self, board_id):
+        state = self.store.get(board_id)
+        if state != None:
+            state = dict(state)
+            state["watermark"] = None
+            self.store.put(board_id, state)
+    #Applies changes reported by monday webhooks to the stored pulses of the board without fetching anything.
+    #changes maps pulse ids to a dict with an optional group_id and columns keyed by column id, returns the
+    #updated raw pulses by id. Pulses the store has never seen are left out
+    def applyPulseChanges(self, board_id, changes):
+        state = self.store.get(board_id)
+        if state == None:
+            return {}
+        updated = {}
+        pulses = list(state["pulses"])
+        for index, pulse in enumerate(pulses):
+            change = changes.get(pulse["pulse"]["id"])
+            if change == None:
+                continue
+            pulse = dict(pulse)
+            if change.get("group_id") != None:
+                pulse["board_meta"] = dict(pulse["board_meta"], group_id=change["group_id"])
+            if len(change.get("columns", {})) > 0:
+                pulse["column_values"] = map(lambda x: dict(x, value=change["columns"][x["cid"]]) if x["cid"] in change["columns"] else x, pulse["column_values"])
+            pulses[index] = pulse
+            updated[pulse["pulse"]["id"]] = pulse
+        if len(updated) > 0:
+            self.store.put(board_id, dict(state, pulses=pulses))
+        return updated
+    def __full_sync(self, board):
+        pulses = self.api.getBoardPulses(board.id)
+        self.store.put(board.id, {"watermark": board.updated_at, "pulse_watermark": self.__pulse_watermark(pulses, None), "full_synced_at": time.time(), "pulses": pulses})
+        return list(pulses)
+    def __pulse_watermark(self, pulses, current):
+        updated = map(lambda x: x["pulse"]["updated_at"], pulses)
+        if current != None:
+            updated.append(current)
+        return max(updated) if len(updated) > 0 else None
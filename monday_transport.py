@@ -0,0 +1,93 @@
+import random
+import threading
+import time
+from monday_metrics import metrics, endpointLabel
+
+#Client side token bucket, callers block in acquire until a token is available
+class MondayTokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity != None else rate)
+        self.tokens = self.capacity
+        self.last_refill = time.time()
+        self.lock = threading.Lock()
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.time()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+#Shared http layer for the monday apis. Keeps one pooled keep-alive session, retries 429 and 5xx responses
+#with jittered exponential backoff (honoring Retry-After) and optionally rate limits through a token bucket.
+#Every attempt is counted and timed per endpoint and status code. requests is only imported and the session only
+#opened on the first request, so commands that never reach monday do not pay for them
+class MondayTransport:
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    def __init__(self, pool_size=10, timeout=(5, 30), max_retries=4, backoff_base=0.5, backoff_max=30, rate_limiter=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.pool_size = pool_size
+        self.session = None
+        self.session_lock = threading.Lock()
+    #Performs the request and returns the final response, the caller is responsible for checking the status
+    def request(self, request_type, url, parameters):
+        if request_type not in ("get", "post", "put", "delete"):
+            raise Exception("Invalid request type")
+        import requests
+        session = self.__session()
+        labels = {"method": request_type, "endpoint": endpointLabel(url)}
+        attempt = 0
+        while True:
+            if self.rate_limiter != None:
+                with metrics.span("monday_rate_limit_wait_seconds"):
+                    self.rate_limiter.acquire()
+            start = time.time()
+            try:
+                response = session.request(request_type.upper(), url, params=parameters, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.observe("monday_http_request_seconds", time.time() - start, labels)
+                metrics.increment("monday_http_requests_total", dict(labels, status="error"))
+                if attempt >= self.max_retries:
+                    raise
+                metrics.increment("monday_http_retries_total", labels)
+                time.sleep(self.__backoff(attempt, None))
+                attempt += 1
+                continue
+            metrics.observe("monday_http_request_seconds", time.time() - start, labels)
+            metrics.increment("monday_http_requests_total", dict(labels, status=response.status_code))
+            if response.status_code not in self.RETRY_STATUS_CODES or attempt >= self.max_retries:
+                return response
+            metrics.increment("monday_http_retries_total", labels)
+            time.sleep(self.__backoff(attempt, response.headers.get("Retry-After")))
+            attempt += 1
+    def close(self):
+        if self.session != None:
+            self.session.close()
+    def __session(self):
+        with self.session_lock:
+            if self.session == None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                session.headers["Connection"] = "keep-alive"
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.session = session
+            return self.session
+    def __backoff(self, attempt, retry_after):
+        if retry_after != None:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
@@ -0,0 +1,28 @@
+import unittest
+import monday
+from fake_monday import FakeMondayData, FakeMondayServer
+from monday_sync import MondayPulseStore
+
+class BoardSchemaCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.data = FakeMondayData.synthetic({"Operations Tasks": 30}, seed=2)
+        self.server = FakeMondayServer(self.data)
+        self.server.start()
+        self.api = monday.MondayAPI("key", "user", base_url=self.server.base_url, pulse_store=MondayPulseStore())
+    def tearDown(self):
+        self.server.stop()
+    def test_unchanged_board_reuses_its_parsed_schema(self):
+        board = self.api.getBoardNamed("Operations Tasks")
+        again = self.api.getBoardNamed("Operations Tasks")
+        self.assertIs(again.columns, board.columns)
+        self.assertIs(again.groups_by_title, board.groups_by_title)
+        self.assertIs(self.api.getBoard(board.id).columns, board.columns)
+    def test_changed_board_is_parsed_again(self):
+        board = self.api.getBoardNamed("Operations Tasks")
+        self.data.movePulses(board.id, [self.data.pulses[board.id][0]["pulse"]["id"]], "completed")
+        changed = self.api.getBoardNamed("Operations Tasks")
+        self.assertNotEqual(changed.updated_at, board.updated_at)
+        self.assertIsNot(changed.columns, board.columns)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+import monday
+from fake_monday import FakeMondayData
+from tests.test_rules import FakeApi, fakeBoard, fakePulse
+
+class DecodeMondayColumnTest(unittest.TestCase):
+    def test_each_pulse_uses_its_own_boards_labels(self):
+        board = fakeBoard()
+        relabeled = monday.MondayBoard(dict(FakeMondayData.synthetic({"Website Tasks": 0}).boards[0], columns=[{"id": "status", "title": "Status", "type": "color", "labels": {"1": "Shipped"}}]), FakeApi())
+        decoded = monday.decodeMondayColumn([fakePulse(board, "this_week", 1), fakePulse(relabeled, "this_week", 1)], "Status")
+        self.assertEqual(map(lambda x: x.value, decoded), ["Done", "Shipped"])
+    def test_pulses_without_the_column_decode_to_none(self):
+        board = monday.MondayBoard(dict(FakeMondayData.synthetic({"Website Tasks": 0}).boards[0], columns=[]), FakeApi())
+        pulse = monday.MondayPulse({"pulse": {"id": 2, "name": "Pulse", "created_at": "", "updated_at": "", "board_id": board.id, "url": ""}, "board_meta": {"group_id": "future"}, "column_values": []}, board.columns)
+        self.assertEqual(monday.decodeMondayColumn([fakePulse(fakeBoard(), "this_week", 1), pulse], "Status")[1], None)
+    def test_registered_type_replaces_the_raw_fallback(self):
+        class MondayRatingColumn(object):
+            def __init__(self, monday_column_json, column=None):
+                self.value = monday_column_json["value"]
+        board = monday.MondayBoard(dict(FakeMondayData.synthetic({"Website Tasks": 0}).boards[0], columns=[{"id": "rating", "title": "Rating", "type": "rating"}]), FakeApi())
+        self.assertIsInstance(board.columns["Rating"]({"cid": "rating", "title": "Rating", "value": 4}), monday.MondayRawColumn)
+        monday.registerMondayColumnType("rating", MondayRatingColumn)
+        try:
+            board = monday.MondayBoard(dict(FakeMondayData.synthetic({"Website Tasks": 0}).boards[0], columns=[{"id": "rating", "title": "Rating", "type": "rating"}]), FakeApi())
+            self.assertIsInstance(board.columns["Rating"]({"cid": "rating", "title": "Rating", "value": 4}), MondayRatingColumn)
+        finally:
+            del monday.MONDAY_COLUMN_TYPES["rating"]
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+import unittest
+import main
+import monday
+from monday_events import parseMondayEvent, verifyMondaySignature
+from monday_sync import MondayPulseStore
+
+SECRET = "signing secret"
+
+def encode(value):
+    return base64.urlsafe_b64encode(json.dumps(value)).rstrip("=")
+
+def signedToken(claims, secret=SECRET, header=None):
+    signing_input = "{}.{}".format(encode(header if header != None else {"alg": "HS256", "typ": "JWT"}), encode(claims))
+    signature = hmac.new(secret, signing_input, hashlib.sha256).digest()
+    return "{}.{}".format(signing_input, base64.urlsafe_b64encode(signature).rstrip("="))
+
+class VerifyMondaySignatureTest(unittest.TestCase):
+    def test_valid_token(self):
+        token = signedToken({"exp": time.time() + 60})
+        self.assertTrue(verifyMondaySignature(token, SECRET))
+        self.assertTrue(verifyMondaySignature("Bearer " + token, SECRET))
+    def test_bad_signature(self):
+        self.assertFalse(verifyMondaySignature(signedToken({}, secret="another secret"), SECRET))
+        header, claims, signature = signedToken({"admin": False}).split(".")
+        self.assertFalse(verifyMondaySignature("{}.{}.{}".format(header, encode({"admin": True}), signature), SECRET))
+    def test_expired_token(self):
+        self.assertFalse(verifyMondaySignature(signedToken({"exp": time.time() - 1}), SECRET))
+    def test_wrong_alg(self):
+        self.assertFalse(verifyMondaySignature(signedToken({}, header={"alg": "none"}), SECRET))
+        self.assertFalse(verifyMondaySignature(signedToken({}, header={"alg": "HS512"}), SECRET))
+    def test_malformed_token(self):
+        self.assertFalse(verifyMondaySignature("", SECRET))
+        self.assertFalse(verifyMondaySignature("not.a.token", SECRET))
+
+class MondayWebhookTest(unittest.TestCase):
+    def createApp(self, config):
+        api = monday.MondayAPI("key", "user", base_url="http://127.0.0.1:1", pulse_store=MondayPulseStore())
+        app = main.create_app(dict(config, MONDAY_START_REFRESHER=False), monday_api=api)
+        self.addCleanup(main.stop_app, app)
+        return app.test_client()
+    def event(self):
+        return json.dumps({"event": {"type": "update_column_value", "boardId": 1, "pulseId": 2, "columnId": "status", "columnType": "color", "value": {"label": {"index": 1}}}})
+    def test_webhook_is_not_served_without_credentials(self):
+        self.assertEqual(self.createApp({}).post("/webhooks/monday", data=self.event()).status_code, 404)
+    def test_token_is_required(self):
+        client = self.createApp({"MONDAY_WEBHOOK_TOKEN": "token"})
+        self.assertEqual(client.post("/webhooks/monday", data=self.event()).status_code, 403)
+        self.assertEqual(client.post("/webhooks/monday?token=wrong", data=self.event()).status_code, 403)
+        self.assertEqual(client.post("/webhooks/monday?token=token", data=self.event()).status_code, 202)
+    def test_signature_is_required(self):
+        client = self.createApp({"MONDAY_WEBHOOK_SIGNING_SECRET": SECRET})
+        self.assertEqual(client.post("/webhooks/monday", data=self.event()).status_code, 403)
+        headers = {"Authorization": signedToken({"exp": time.time() + 60})}
+        self.assertEqual(client.post("/webhooks/monday", data=self.event(), headers=headers).status_code, 202)
+
+class ParseMondayEventTest(unittest.TestCase):
+    def test_column_and_group_events(self):
+        self.assertEqual(parseMondayEvent({"event": {"type": "update_column_value", "boardId": "1", "pulseId": "2", "columnId": "status", "columnType": "color", "value": {"label": {"index": 1, "text": "Done"}}}}), (1, 2, {"group_id": None, "columns": {"status": {"index": 1}}, "stale": False}))
+        self.assertEqual(parseMondayEvent({"event": {"type": "move_pulse_into_group", "boardId": 1, "pulseId": 2, "destGroupId": "completed"}}), (1, 2, {"group_id": "completed", "columns": {}, "stale": False}))
+    def test_other_pulse_events_mark_the_board_stale(self):
+        self.assertTrue(parseMondayEvent({"event": {"type": "create_pulse", "boardId": 1, "pulseId": 2}})[2]["stale"])
+        self.assertEqual(parseMondayEvent({"event": {"type": "create_board"}}), None)
+
+if __name__ == "__main__":
+    unittest.main()
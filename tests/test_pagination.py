@@ -0,0 +1,17 @@
+import unittest
+import monday
+from fake_monday import FakeMondayData, FakeMondayServer
+
+class PaginationTest(unittest.TestCase):
+    def test_page_size_above_the_server_cap_returns_the_whole_board(self):
+        server = FakeMondayServer(FakeMondayData.synthetic({"Operations Tasks": 100}), max_per_page=25)
+        server.start()
+        try:
+            for concurrency in (1, 4):
+                api = monday.MondayAPI("key", "user", page_size=50, page_concurrency=concurrency, base_url=server.base_url)
+                self.assertEqual(len(api.getBoardPulses(1)), 100)
+        finally:
+            server.stop()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+import monday
+from fake_monday import FakeMondayData, FakeMondayServer
+from monday_automations import MondayAutomator
+
+class ResetWeekTest(unittest.TestCase):
+    def setUp(self):
+        self.data = FakeMondayData.synthetic({"Operations Tasks": 300}, seed=3)
+        self.server = FakeMondayServer(self.data)
+        self.server.start()
+        self.api = monday.MondayAPI("key", "user", base_url=self.server.base_url)
+        self.api.move_chunk_size = 10
+        self.directory = tempfile.mkdtemp()
+        self.automator = MondayAutomator(rules_path=os.path.join(self.directory, "automation_rules.json"), api=self.api)
+        self.checkpoint_path = os.path.join(self.directory, "checkpoint.json")
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+    def test_plan_skips_pulses_already_in_their_target_group(self):
+        report = self.automator.plan_week(record_history=False)[0]
+        self.assertTrue(len(report["planned_moves"]) > 0)
+        for move in report["planned_moves"]:
+            self.assertNotEqual(move["from_group_id"], move["to_group_id"])
+    def test_resume_skips_completed_chunks_and_removes_the_checkpoint(self):
+        move = self.api.movePulsesToGroup
+        calls = []
+        def failing_once(board_id, pulse_ids, group_id):
+            calls.append(pulse_ids)
+            if len(calls) == 2:
+                raise Exception("Monday rate limit exceeded")
+            return move(board_id, pulse_ids, group_id)
+        self.api.movePulsesToGroup = failing_once
+        report = self.automator.reset_week(checkpoint_path=self.checkpoint_path)[0]
+        planned = len(report["planned_moves"])
+        self.assertEqual(report["failed_moves"], len(calls[1]))
+        self.assertEqual(report["move_error"], "Monday rate limit exceeded")
+        self.assertEqual(sum(report["moves"].values()), planned - len(calls[1]))
+        self.assertTrue(os.path.exists(self.checkpoint_path))
+        requests = dict(self.server.request_counts)
+        report = self.automator.reset_week(checkpoint_path=self.checkpoint_path)[0]
+        self.assertTrue(report["resumed"])
+        self.assertEqual(report["failed_moves"], 0)
+        self.assertEqual(report["move_error"], None)
+        self.assertEqual(report["plan_error"], None)
+        self.assertEqual(sum(report["moves"].values()), planned)
+        self.assertEqual(calls[-1], calls[1])
+        self.assertEqual(self.server.request_counts.get("pulses"), requests.get("pulses"))
+        self.assertEqual(self.server.request_counts.get("boards"), requests.get("boards"))
+        self.assertEqual(self.server.request_counts["move"] - requests["move"], 1)
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+    def test_report_times_planning_and_moving_per_board(self):
+        report = self.automator.reset_week()[0]
+        self.assertTrue(report["plan_seconds"] > 0)
+        self.assertTrue(report["apply_seconds"] > 0)
+        self.assertAlmostEqual(report["seconds"], report["plan_seconds"] + report["apply_seconds"])
+    def test_dry_run_moves_nothing(self):
+        report = self.automator.reset_week(dry_run=True)[0]
+        self.assertTrue(len(report["planned_moves"]) > 0)
+        self.assertEqual(self.server.request_counts.get("move", 0), 0)
+
+if __name__ == "__main__":
+    unittest.main()
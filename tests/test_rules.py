@@ -0,0 +1,50 @@
+import datetime
+import unittest
+import monday
+import monday_rules
+from fake_monday import FakeMondayData
+
+class FakeApi:
+    sync = None
+
+def fakeBoard(groups=None):
+    data = FakeMondayData.synthetic({"Operations Tasks": 0})
+    board_json = data.boards[0]
+    if groups != None:
+        board_json = dict(board_json, groups=filter(lambda x: x["title"] in groups, board_json["groups"]))
+    return monday.MondayBoard(board_json, FakeApi())
+
+def fakePulse(board, group_id, status_index, timeline_from="2026-10-20"):
+    return monday.MondayPulse({
+        "pulse": {"id": 1, "name": "Pulse", "created_at": "2018-01-01T00:00:00Z", "updated_at": "2018-01-01T00:00:00Z", "board_id": board.id, "url": ""},
+        "board_meta": {"group_id": group_id},
+        "column_values": [
+            {"cid": "status", "title": "Status", "value": {"index": status_index}},
+            {"cid": "timeline", "title": "Timeline", "value": {"from": timeline_from, "to": timeline_from}}
+        ]
+    }, board.columns)
+
+class CompileRulesTest(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime.datetime(2026, 10, 18)
+    def test_classify(self):
+        board = fakeBoard()
+        rules = monday_rules.compileRules(monday_rules.DEFAULT_RULES, board, self.now)
+        self.assertEqual(rules.skipped, [])
+        self.assertEqual(rules.classify(fakePulse(board, "this_week", 1)).id, "completed")
+        self.assertEqual(rules.classify(fakePulse(board, "this_week", 0)), None)
+        self.assertEqual(rules.classify(fakePulse(board, "future", 0, "2026-10-20")).id, "this_week")
+        self.assertEqual(rules.classify(fakePulse(board, "future", 0, "2026-11-20")), None)
+    def test_rule_with_missing_group_is_skipped(self):
+        board = fakeBoard(["This Week", "Future"])
+        rules = monday_rules.compileRules(monday_rules.DEFAULT_RULES, board, self.now)
+        self.assertEqual(rules.skipped, [{"rule": "finished", "reason": "No group named Completed"}])
+        self.assertEqual(rules.classify(fakePulse(board, "this_week", 1)), None)
+        self.assertEqual(rules.classify(fakePulse(board, "future", 0)).id, "this_week")
+    def test_rule_with_missing_column_is_skipped(self):
+        rules = monday_rules.compileRules([{"name": "x", "column": "Priority", "value": "High", "move_to": "Completed"}], fakeBoard(), self.now)
+        self.assertEqual(rules.rules, [])
+        self.assertEqual(rules.skipped, [{"rule": "x", "reason": "No column named Priority"}])
+
+if __name__ == "__main__":
+    unittest.main()
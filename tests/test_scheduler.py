@@ -0,0 +1,45 @@
+import datetime
+import unittest
+from monday_scheduler import MondayCronSchedule, MondayJob, MondayScheduler
+
+class MondayCronScheduleTest(unittest.TestCase):
+    def test_matches(self):
+        schedule = MondayCronSchedule("*/15 6-8 * * 1")
+        self.assertTrue(schedule.matches(datetime.datetime(2026, 10, 19, 6, 30)))
+        self.assertFalse(schedule.matches(datetime.datetime(2026, 10, 19, 6, 31)))
+        self.assertFalse(schedule.matches(datetime.datetime(2026, 10, 19, 9, 0)))
+        self.assertFalse(schedule.matches(datetime.datetime(2026, 10, 20, 6, 30)))
+    def test_next_run(self):
+        schedule = MondayCronSchedule("0 6 * * 1")
+        self.assertEqual(schedule.nextRun(datetime.datetime(2026, 10, 18, 12, 0)), datetime.datetime(2026, 10, 19, 6, 0))
+        self.assertEqual(schedule.nextRun(datetime.datetime(2026, 10, 19, 6, 0)), datetime.datetime(2026, 10, 26, 6, 0))
+    def test_either_day_field_matches_when_both_are_restricted(self):
+        schedule = MondayCronSchedule("0 6 1 * 1")
+        self.assertTrue(schedule.matches(datetime.datetime(2026, 10, 1, 6, 0)))
+        self.assertTrue(schedule.matches(datetime.datetime(2026, 10, 19, 6, 0)))
+        self.assertFalse(schedule.matches(datetime.datetime(2026, 10, 20, 6, 0)))
+    def test_seven_is_sunday(self):
+        self.assertTrue(MondayCronSchedule("0 6 * * 7").matches(datetime.datetime(2026, 10, 18, 6, 0)))
+    def test_invalid_expressions(self):
+        self.assertRaises(Exception, MondayCronSchedule, "0 6 * *")
+        self.assertRaises(Exception, MondayCronSchedule, "60 6 * * *")
+        self.assertRaises(Exception, MondayCronSchedule, "0 6 * * mon")
+
+class MondaySchedulerTest(unittest.TestCase):
+    def test_status_works_out_next_run_without_holding_the_lock(self):
+        scheduler = MondayScheduler(workers=1)
+        job = MondayJob("reset_week", "0 6 * * 1", lambda: None)
+        next_run = job.schedule.nextRun
+        def unlocked_next_run(after):
+            self.assertFalse(scheduler.lock.locked())
+            return next_run(after)
+        job.schedule.nextRun = unlocked_next_run
+        scheduler.register(job)
+        scheduler.register(MondayJob("never", "0 0 31 2 *", lambda: None))
+        status = scheduler.status()
+        self.assertEqual(datetime.datetime.strptime(status["reset_week"]["next_run"], "%Y-%m-%dT%H:%M:%S").weekday(), 0)
+        self.assertEqual(status["never"]["next_run"], None)
+        scheduler.stop()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import unittest
+import main
+import monday
+from fake_monday import FakeMondayData, FakeMondayServer
+from monday_sync import MondayPulseStore
+
+class SnapshotServerTest(unittest.TestCase):
+    def setUp(self):
+        self.data = FakeMondayData.synthetic({"Operations Tasks": 60}, seed=4)
+        self.server = FakeMondayServer(self.data)
+        self.server.start()
+        api = monday.MondayAPI("key", "user", base_url=self.server.base_url, pulse_store=MondayPulseStore())
+        self.app = main.create_app({"MONDAY_START_REFRESHER": False}, monday_api=api)
+        self.snapshot = self.app.extensions["monday"]["snapshot"]
+        self.client = self.app.test_client()
+    def tearDown(self):
+        main.stop_app(self.app)
+        self.server.stop()
+    def test_not_ready_before_the_first_refresh(self):
+        self.assertEqual(self.client.get("/boards").status_code, 503)
+        self.assertEqual(self.client.get("/readyz").status_code, 503)
+    def test_etag_answers_304_until_the_data_changes(self):
+        self.snapshot.refresh()
+        response = self.client.get("/boards")
+        etag = response.headers["ETag"]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/boards", headers={"If-None-Match": etag}).status_code, 304)
+        self.data.movePulses(1, [self.data.pulses[1][0]["pulse"]["id"]], "completed")
+        self.snapshot.refresh()
+        response = self.client.get("/boards", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+    def test_cursor_pages_through_every_pulse_once(self):
+        self.snapshot.refresh()
+        ids = []
+        cursor = None
+        while True:
+            url = "/boards/1/pulses?limit=25" + ("&cursor={}".format(cursor) if cursor != None else "")
+            page = json.loads(self.client.get(url).data)
+            ids += map(lambda x: x["id"], page["pulses"])
+            cursor = page["next_cursor"]
+            if cursor == None:
+                break
+        self.assertEqual(ids, sorted(map(lambda x: x["pulse"]["id"], self.data.pulses[1])))
+    def test_unknown_board_is_not_found(self):
+        self.snapshot.refresh()
+        self.assertEqual(self.client.get("/boards/99/pulses").status_code, 404)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import monday
+from fake_monday import FakeMondayData, FakeMondayServer
+from monday_store import MondayHistoryStore
+
+class MondayHistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.data = FakeMondayData.synthetic({"Operations Tasks": 40}, seed=5)
+        self.server = FakeMondayServer(self.data)
+        self.server.start()
+        self.api = monday.MondayAPI("key", "user", base_url=self.server.base_url)
+        self.store = MondayHistoryStore(":memory:")
+        self.moved = next(x for x in self.data.pulses[1] if x["board_meta"]["group_id"] != "completed")
+        self.from_group_id = self.moved["board_meta"]["group_id"]
+        self.first = self.snapshot(1000)
+        self.data.movePulses(1, [self.moved["pulse"]["id"]], "completed")
+        self.second = self.snapshot(2000)
+    def tearDown(self):
+        self.server.stop()
+    def snapshot(self, taken_at):
+        snapshot_id = self.store.createSnapshot(taken_at)
+        board = self.api.getBoards()[0]
+        self.store.recordPulses(snapshot_id, board, board.iterPulses())
+        return snapshot_id
+    def test_moved_since_compares_with_the_last_snapshot_before(self):
+        moved = self.store.movedSince(1500)
+        self.assertEqual(map(lambda x: (x["pulse_id"], x["from_group_id"], x["group_id"]), moved), [(self.moved["pulse"]["id"], self.from_group_id, "completed")])
+        self.assertEqual(self.store.movedSince(500), moved)
+        self.assertEqual(self.store.movedSince(2500), [])
+        self.assertEqual(self.store.movedSince(1500, board_id=2), [])
+    def test_prune_drops_old_snapshots_with_their_pulses(self):
+        self.assertEqual(self.store.pruneSnapshots(1500), 1)
+        self.assertEqual(self.store.latestSnapshot(1500), None)
+        self.assertEqual(self.store.pulsesStartingBefore("9999-12-31", snapshot_id=self.first), [])
+        self.assertEqual(self.store.columnValues(self.moved["pulse"]["id"], self.first), {})
+        self.assertEqual(len(self.store.pulsesStartingBefore("9999-12-31", snapshot_id=self.second)), 40)
+        self.assertEqual(self.store.movedSince(500), [])
+
+if __name__ == "__main__":
+    unittest.main()
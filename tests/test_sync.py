@@ -0,0 +1,41 @@
+import unittest
+import monday
+from fake_monday import FakeMondayData, FakeMondayServer
+from monday_sync import MondayPulseStore
+
+class MondayPulseSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.data = FakeMondayData.synthetic({"Operations Tasks": 60}, seed=1)
+        self.server = FakeMondayServer(self.data)
+        self.server.start()
+        self.api = monday.MondayAPI("key", "user", base_url=self.server.base_url, pulse_store=MondayPulseStore())
+    def tearDown(self):
+        self.server.stop()
+    def board(self):
+        return self.api.getBoards()[0]
+    def pulseRequests(self):
+        return self.server.request_counts.get("pulses", 0)
+    def test_unchanged_board_is_not_fetched_again(self):
+        self.assertEqual(len(self.board().getPulses()), 60)
+        requests = self.pulseRequests()
+        self.assertEqual(len(self.board().getPulses()), 60)
+        self.assertEqual(self.pulseRequests(), requests)
+    def test_changed_pulses_are_merged(self):
+        self.board().getPulses()
+        moved = self.data.pulses[1][5]["pulse"]["id"]
+        self.data.movePulses(1, [moved], "completed")
+        requests = self.pulseRequests()
+        pulses = self.board().getPulses()
+        self.assertEqual(len(pulses), 60)
+        self.assertEqual(next(x for x in pulses if x.id == moved).group_id, "completed")
+        self.assertEqual(self.pulseRequests() - requests, 1)
+    def test_mark_stale_forces_a_fetch(self):
+        board = self.board()
+        board.getPulses()
+        requests = self.pulseRequests()
+        self.api.sync.markStale(board.id)
+        self.board().getPulses()
+        self.assertEqual(self.pulseRequests() - requests, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import time
+import unittest
+import monday_transport
+from fake_monday import FakeMondayData, FakeMondayServer
+from monday_transport import MondayTransport
+
+#Stands in for the time module in monday_transport, records the backoff sleeps instead of waiting
+class RecordingTime:
+    def __init__(self):
+        self.sleeps = []
+    def time(self):
+        return time.time()
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+class MondayTransportTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeMondayServer(FakeMondayData.synthetic({"Operations Tasks": 1}))
+        self.server.start()
+        self.url = self.server.base_url + "/v1/boards.json"
+        self.clock = RecordingTime()
+        monday_transport.time = self.clock
+    def tearDown(self):
+        monday_transport.time = time
+        self.server.stop()
+    def requests(self):
+        return self.server.request_counts.get("boards", 0)
+    def test_retries_until_the_request_goes_through(self):
+        self.server.failWith(503, 2)
+        response = MondayTransport().request("get", self.url, {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.requests(), 3)
+        self.assertEqual(len(self.clock.sleeps), 2)
+    def test_backoff_grows_exponentially(self):
+        self.server.failWith(500, 3)
+        MondayTransport(backoff_base=0.5).request("get", self.url, {})
+        for attempt, seconds in enumerate(self.clock.sleeps):
+            self.assertTrue(0 <= seconds <= 0.5 * 2 ** attempt)
+    def test_retry_after_is_honored_up_to_backoff_max(self):
+        self.server.failWith(429, 1, retry_after=3)
+        self.server.failWith(429, 1, retry_after=120)
+        response = MondayTransport(backoff_max=30).request("get", self.url, {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.clock.sleeps, [3.0, 30])
+    def test_gives_up_after_max_retries(self):
+        self.server.failWith(429, 10)
+        response = MondayTransport(max_retries=2).request("get", self.url, {})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.requests(), 3)
+    def test_other_errors_are_not_retried(self):
+        self.server.failWith(401)
+        response = MondayTransport().request("get", self.url, {})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.requests(), 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+if __name__ == "__main__":
+    unittest.main()
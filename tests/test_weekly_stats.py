@@ -0,0 +1,49 @@
+import datetime
+import unittest
+import monday
+import weekly_stats
+from fake_monday import FakeMondayData, FakeMondayServer
+
+def fakePulse(pulse_id, group_id, status_index, owner_id, timeline, created_at, updated_at):
+    return {
+        "pulse": {"id": pulse_id, "name": "Pulse", "created_at": created_at + "T00:00:00Z", "updated_at": updated_at + "T00:00:00Z", "board_id": pulse_id / 100, "url": ""},
+        "board_meta": {"group_id": group_id},
+        "column_values": [
+            {"cid": "status", "title": "Status", "value": {"index": status_index} if status_index != None else None},
+            {"cid": "person", "title": "Person", "value": {"id": owner_id, "name": "Person", "title": ""} if owner_id != None else None},
+            {"cid": "timeline", "title": "Timeline", "value": {"from": timeline[0], "to": timeline[1]} if timeline != None else None}
+        ]
+    }
+
+class WeeklyStatsTest(unittest.TestCase):
+    def setUp(self):
+        data = FakeMondayData.synthetic({"Operations Tasks": 0, "Website Tasks": 0})
+        data.pulses[1] = [
+            fakePulse(101, "this_week", 1, 1, None, "2026-10-10", "2026-10-13"),
+            fakePulse(102, "completed", None, 1, None, "2026-10-01", "2026-10-15"),
+            fakePulse(103, "this_week", 0, 2, ("2026-10-14", "2026-10-20"), "2026-10-01", "2026-10-01"),
+            fakePulse(104, "this_week", 2, 2, ("2026-10-01", "2026-10-05"), "2026-10-01", "2026-10-01")
+        ]
+        data.pulses[2] = [fakePulse(201, "future", 1, None, None, "2026-10-01", "2026-10-05")]
+        self.server = FakeMondayServer(data)
+        self.server.start()
+        api = monday.MondayAPI("key", "user", base_url=self.server.base_url)
+        self.stats = weekly_stats.weeklyStats(weekly_stats.pulseFrame(api), datetime.date(2026, 10, 12), as_of=datetime.datetime(2026, 10, 16))
+    def tearDown(self):
+        self.server.stop()
+    def test_board_stats(self):
+        boards = dict(map(lambda x: (x["board"], x), self.stats["boards"]))
+        self.assertEqual((self.stats["week_start"], self.stats["week_end"]), ("2026-10-12", "2026-10-19"))
+        self.assertEqual(boards["Operations Tasks"], {"board": "Operations Tasks", "pulses": 4, "throughput": 2, "cycle_time_days": 8.5, "wip": 1, "overdue": 1})
+        self.assertEqual(boards["Website Tasks"], {"board": "Website Tasks", "pulses": 1, "throughput": 0, "cycle_time_days": None, "wip": 0, "overdue": 0})
+    def test_group_and_person_stats(self):
+        groups = dict(map(lambda x: ((x["board"], x["group"]), x), self.stats["groups"]))
+        self.assertEqual(groups[("Operations Tasks", "Completed")]["throughput"], 1)
+        self.assertEqual(groups[("Operations Tasks", "This Week")]["pulses"], 3)
+        people = dict(map(lambda x: (x["owner"], x), self.stats["people"]))
+        self.assertEqual((people[1]["throughput"], people[1]["cycle_time_days"]), (2, 8.5))
+        self.assertEqual((people[2]["wip"], people[2]["overdue"]), (1, 1))
+        self.assertEqual(people[-1]["pulses"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
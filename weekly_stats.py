@@ -0,0 +1,81 @@
+import datetime
+import json
+import numpy as np
+import pandas as pd
+
+#Reads the pulses of the boards into one column per field. Statuses become categorical labels, timelines and
+#timestamps datetime64 and owners the integer id of the board's person column (-1 when unassigned)
+def pulseFrame(api, board_names=None):
+    columns = {"board": [], "group": [], "status": [], "owner": [], "timeline_from": [], "timeline_to": [], "created_at": [], "updated_at": []}
+    for board in api.getBoards():
+        if board_names != None and board.name not in board_names:
+            continue
+        status_labels = board.column_definitions.get("Status", {}).get("labels", {})
+        person_title = next((x["title"] for x in board.column_definitions.values() if x["type"] == "person"), None)
+        group_titles = dict(map(lambda x: (x.id, x.title), board.groups))
+        for pulse in board.iterPulses():
+            values = pulse.column_values
+            status = values["Status"].get("value") if "Status" in values else None
+            owner = values[person_title].get("value") if person_title in values else None
+            timeline = values["Timeline"].get("value") if "Timeline" in values else None
+            columns["board"].append(board.name)
+            columns["group"].append(group_titles.get(pulse.group_id, pulse.group_id))
+            columns["status"].append(status_labels.get(str(status["index"])) if status != None and status.get("index") != None else None)
+            columns["owner"].append(owner["id"] if owner != None else -1)
+            columns["timeline_from"].append(timeline["from"] if timeline != None else None)
+            columns["timeline_to"].append(timeline["to"] if timeline != None else None)
+            columns["created_at"].append(pulse.created_on)
+            columns["updated_at"].append(pulse.updated_on)
+    frame = pd.DataFrame(columns)
+    for title in ("board", "group", "status"):
+        frame[title] = frame[title].astype("category")
+    frame["owner"] = frame["owner"].astype(np.int64)
+    for title in ("timeline_from", "timeline_to"):
+        frame[title] = pd.to_datetime(frame[title], format='%Y-%m-%d', errors="coerce")
+    for title in ("created_at", "updated_at"):
+        frame[title] = pd.to_datetime(frame[title], errors="coerce", utc=True).dt.tz_convert(None)
+    return frame
+
+#Computes the week starting at week_start for every board, group and person. A pulse is done when its status is
+#Done or it sits in Completed. Throughput counts pulses finished (last updated) during the week, cycle time is the
+#mean days from creation to that update, WIP counts unfinished pulses whose timeline overlaps the week and overdue
+#counts unfinished pulses whose timeline ended before as_of
+def weeklyStats(frame, week_start, as_of=None):
+    week_start = pd.Timestamp(week_start)
+    week_end = week_start + pd.Timedelta(days=7)
+    as_of = pd.Timestamp(as_of) if as_of != None else min(week_end, pd.Timestamp(datetime.datetime.utcnow()))
+    done = ((frame["status"] == "Done") | (frame["group"] == "Completed")).values
+    updated = frame["updated_at"].values
+    finished = done & (updated >= week_start.to_datetime64()) & (updated < week_end.to_datetime64())
+    measures = pd.DataFrame({
+        "board": frame["board"],
+        "group": frame["group"],
+        "owner": frame["owner"],
+        "pulses": np.ones(len(frame), dtype=np.int64),
+        "throughput": finished,
+        "cycle_time_days": np.where(finished, (frame["updated_at"] - frame["created_at"]).dt.total_seconds().values / 86400.0, np.nan),
+        "wip": ~done & (frame["timeline_from"] < week_end).values & (frame["timeline_to"] >= week_start).values,
+        "overdue": ~done & (frame["timeline_to"] < as_of).values
+    })
+    aggregations = {"pulses": "sum", "throughput": "sum", "cycle_time_days": "mean", "wip": "sum", "overdue": "sum"}
+    def grouped(keys):
+        result = measures.groupby(keys, observed=True).agg(aggregations).reset_index()
+        result[["throughput", "wip", "overdue"]] = result[["throughput", "wip", "overdue"]].astype(np.int64)
+        return json.loads(result.to_json(orient="records"))
+    return {
+        "week_start": week_start.strftime('%Y-%m-%d'),
+        "week_end": week_end.strftime('%Y-%m-%d'),
+        "boards": grouped(["board"]),
+        "groups": grouped(["board", "group"]),
+        "people": grouped(["owner"])
+    }
+
+#Monday of the week the date falls in
+def weekStart(date=None):
+    date = date if date != None else datetime.date.today()
+    return date - datetime.timedelta(days=date.weekday())
+
+def exportWeeklyStats(stats, path):
+    stats_file = open(path, "w")
+    json.dump(stats, stats_file, indent=2)
+    stats_file.close()